@@ -0,0 +1,189 @@
+"""
+Throughput benchmark of the simulation on the bundled problem instances and on scaled instances.
+
+Every case runs a seeded, headless model (no generated files) until all orders are delivered, and measures
+  - wall time to completion and steps per second (plain run),
+  - time and number of calls of the phases of the run and its algorithm counters (second run with a
+    `source.profiler.PhaseProfiler`),
+  - peak memory of the model, allocated by Python (third run under tracemalloc, which is slow: first seed only).
+A scaled instance `{instance}x{k}` repeats the trucks and orders of a bundled instance k times (same regions and map).
+A synthetic instance `{regions}:{trucks}:{orders}` is generated by `source.generator` (seed 0).
+Results are written to a JSON file. Run from the src folder:
+  python -m performance_analysis.benchmark --instances 11 139 180 --scales 180x2 180x5 --synthetic 4:100:2500 --seeds 0 1 2
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import source.generator as gen
+from source.model import TransportationModel
+from source.profiler import PhaseProfiler
+
+MODEL_PARAMS = {'dt': 6e-2, 'agent_velocity': 10., 'trace_level': 'none', 'plot': False}   # parameters of the browser simu
+SCALED_DIR = 'generated_files/benchmark'
+MAX_STEPS = 100000
+
+
+def scale_instance(instance_nr, k, output_dir=SCALED_DIR):
+  """
+  Writes a problem instance with the trucks and orders of a bundled instance repeated k times.
+
+  Args:
+    instance_nr: Number of the bundled instance.
+    k: Scale factor.
+    output_dir: Folder of the scaled instance file.
+
+  Returns:
+    str: path of the scaled instance file.
+  """
+  with open(f'data_sets/problem_instance_{instance_nr}.json') as f:
+    data = json.load(f)
+
+  n_trucks, n_orders = len(data['trucks']), len(data['orders'])
+  data['instance_id'] = f'{instance_nr}x{k}'
+  data['trucks'] = [{**truck, 'truckId': truck['truckId'] + i * n_trucks} for i in range(k) for truck in data['trucks']]
+  data['orders'] = [{**order, 'orderId': order['orderId'] + i * n_orders} for i in range(k) for order in data['orders']]
+  data['solution'] = None
+
+  os.makedirs(output_dir, exist_ok=True)
+  path = f'{output_dir}/problem_instance_{instance_nr}x{k}.json'
+  with open(path, 'w') as f:
+    json.dump(data, f)
+  return path
+
+
+def synthetic_instance(spec, output_dir=SCALED_DIR):
+  """
+  Writes a synthetic instance generated by `source.generator` (seed 0, default freighter mix and distributions).
+
+  Args:
+    spec: "{regions}:{trucks}:{orders}" string.
+    output_dir: Folder of the instance file.
+
+  Returns:
+    str: path of the synthetic instance file.
+  """
+  n_regions, n_trucks, n_orders = (int(value) for value in spec.split(':'))
+  os.makedirs(output_dir, exist_ok=True)
+  path = f'{output_dir}/problem_instance_{n_regions}_{n_trucks}_{n_orders}.json'
+  gen.write_instance(gen.generate_instance(spec, n_regions, n_trucks, n_orders, seed=0), path)
+  return path
+
+
+def run_case(instance, seed, data_set=None, model_params=None):
+  """
+  Runs one model until all orders are delivered (or MAX_STEPS ticks).
+
+  Returns:
+    tuple: the model and the wall time in seconds (construction excluded).
+  """
+  model = TransportationModel(instance_number=instance, seed=seed, data_set=data_set, **{**MODEL_PARAMS, **(model_params or {})})
+  start = time.perf_counter()
+  ticks = 0
+  while model.running and ticks < MAX_STEPS:
+    model.step()
+    ticks += 1
+  return model, time.perf_counter() - start
+
+
+def benchmark_case(instance, seed, data_set=None, model_params=None, memory=True):
+  """
+  Benchmarks one (instance, seed) case.
+
+  Args:
+    instance: Instance number, or name of a scaled instance.
+    seed: Seed of the model's random generator.
+    data_set: Path of the instance file (None for bundled instances).
+    model_params: Further keyword arguments of the model.
+    memory: Whether to measure the peak memory (None otherwise).
+
+  Returns:
+    dict: measurements of the case.
+  """
+  model, wall_time = run_case(instance, seed, data_set, model_params)
+
+  profiler = PhaseProfiler()
+  profiled_model, phased_wall_time = run_case(instance, seed, data_set, {**(model_params or {}), 'profiler': profiler})
+  report = profiler.report(profiled_model)
+
+  peak = None
+  if memory:
+    tracemalloc.start()
+    try:
+      run_case(instance, seed, data_set, model_params)
+      _, peak = tracemalloc.get_traced_memory()
+    finally:
+      tracemalloc.stop()
+
+  return {
+    "instance": str(instance),
+    "seed": seed,
+    "trucks": len(model.trucks),
+    "orders": len(model.orders),
+    "completed": not model.running,
+    "steps": model.curr_step,
+    "wall_time_s": wall_time,
+    "steps_per_s": model.curr_step / wall_time if wall_time else None,
+    "peak_memory_mb": peak and peak / 2**20,
+    "phases": {name: {**phase, "share": phase["time_s"] / phased_wall_time} for name, phase in report["phases"].items()},
+    "counters": report["counters"],
+    "num_truck_drives": model.results and model.results["num_truck_drives"],
+  }
+
+
+def run_benchmark(instances, scales, seeds, model_params=None, synthetic=()):
+  """
+  Benchmarks every bundled and scaled instance with every seed.
+
+  Args:
+    instances: Numbers of bundled instances.
+    scales: Scaled instances as "{instance}x{k}" strings.
+    seeds: Seeds of every case.
+    model_params: Further keyword arguments of the models.
+    synthetic: Synthetic instances as "{regions}:{trucks}:{orders}" strings.
+
+  Returns:
+    dict: environment and the measurements of every case.
+  """
+  cases = [(instance, None) for instance in instances]
+  for scale in scales:
+    instance_nr, k = (int(value) for value in scale.split('x'))
+    cases.append((scale, scale_instance(instance_nr, k)))
+  cases += [(spec, synthetic_instance(spec)) for spec in synthetic]
+
+  results = [benchmark_case(instance, seed, data_set, model_params, memory=seed == seeds[0])
+             for instance, data_set in cases for seed in seeds]
+  return {
+    "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "model_params": {**MODEL_PARAMS, **(model_params or {})},
+    "results": results,
+  }
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Benchmarks the simulation throughput on bundled and scaled problem instances.")
+  parser.add_argument('--instances', type=int, nargs='*', default=[11, 139, 180])
+  parser.add_argument('--scales', nargs='*', default=['180x2', '180x5'], help='scaled instances, e.g. 180x5')
+  parser.add_argument('--synthetic', nargs='*', default=['4:100:2500'], help='synthetic instances, e.g. 8:1000:100000 (regions:trucks:orders)')
+  parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+  parser.add_argument('--event-driven', action='store_true')
+  parser.add_argument('--batch-onlookers', action='store_true')
+  parser.add_argument('--output', default='generated_files/benchmark_results.json')
+  args = parser.parse_args()
+
+  benchmark = run_benchmark(args.instances, args.scales, args.seeds, {'event_driven': args.event_driven, 'batch_onlookers': args.batch_onlookers}, args.synthetic)
+  with open(args.output, 'w') as f:
+    json.dump(benchmark, f, indent=2)
+
+  for result in benchmark["results"]:
+    memory = f', peak {result["peak_memory_mb"]:.1f} MB' if result["peak_memory_mb"] is not None else ''
+    phases = ', '.join(f'{name} {phase["share"]:.0%}' for name, phase in result["phases"].items())
+    print(f'{result["instance"]:>8} seed {result["seed"]}: {result["steps"]} steps in {result["wall_time_s"]:.2f} s '
+          f'({result["steps_per_s"]:.0f} steps/s){memory} | {phases}')
+  print(f"Results written to {args.output}")
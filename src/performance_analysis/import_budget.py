@@ -0,0 +1,58 @@
+"""
+Checks the import time of the headless simulation core against the recorded budget.
+
+Imports `source.model` in fresh interpreters (as a batch worker process does), takes the best of several runs and
+checks that no plotting or visualization module was loaded. Run from the src folder:
+  python -m performance_analysis.import_budget
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+IMPORT_BUDGET_S = 0.25                                                  # recorded budget, measured ~0.1 s (numpy is the main cost)
+FORBIDDEN_MODULES = ('mesa', 'matplotlib', 'pandas', 'networkx', 'tornado')
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def measure_import(module='source.model', repeats=5):
+  """
+  Imports a module in fresh interpreters.
+
+  Args:
+    module: Module to import.
+    repeats: Number of fresh interpreters.
+
+  Returns:
+    tuple: best import time in seconds and the forbidden packages that were loaded by the import.
+  """
+  best, loaded = float('inf'), set()
+  for _ in range(repeats):
+    output = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], capture_output=True, text=True, check=True).stdout
+    probe = json.loads(output)
+    best = min(best, probe['elapsed'])
+    loaded |= {m.split('.')[0] for m in probe['modules']} & set(FORBIDDEN_MODULES)
+  return best, sorted(loaded)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Checks the import time of the simulation core against the recorded budget.")
+  parser.add_argument('--module', default='source.model')
+  parser.add_argument('--repeats', type=int, default=5)
+  parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_S)
+  args = parser.parse_args()
+
+  elapsed, loaded = measure_import(args.module, args.repeats)
+  print(f"import {args.module}: {elapsed * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+  if loaded:
+    sys.exit(f"Importing {args.module} loads {', '.join(loaded)}")
+  if elapsed > args.budget:
+    sys.exit(f"Importing {args.module} exceeds the import budget")
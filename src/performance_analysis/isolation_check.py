@@ -0,0 +1,74 @@
+"""
+Checks that TransportationModel instances sharing one interpreter are isolated from each other.
+
+Runs N seeded models one after another, and then the same N models concurrently in a thread pool, and compares
+their results (steps until completion and load per drive statistics). The models write no generated files. Run from the
+src folder (or `python -m pytest tests`):
+  python -m performance_analysis.isolation_check --instance 139 --models 8
+"""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from source.model import TransportationModel
+
+
+def run_model(instance_nr, seed, simu_run, model_params):
+  """
+  Runs a seeded model until all orders are delivered.
+
+  Args:
+    instance_nr: Instance number for simulation run.
+    seed: Seed of the model's random generator.
+    simu_run: Simulation run number.
+    model_params: Further keyword arguments of the model (without generated files, unless a trace_level is given).
+
+  Returns:
+    tuple: steps until completion and the statistics of the run.
+  """
+  model_params = {'trace_level': 'none', **model_params}
+  model = TransportationModel(instance_number=instance_nr, simu_run=simu_run, seed=seed, plot=False, **model_params)
+  model.run_model()
+  return model.curr_step, model.results
+
+
+def check_isolation(instance_nr, n_models, model_params=None):
+  """
+  Compares the results of N isolated runs with N concurrent runs of the same seeds in threads.
+
+  Args:
+    instance_nr: Instance number for simulation run.
+    n_models: Number of models (seeds 0 .. n_models - 1).
+    model_params: Further keyword arguments of the models.
+
+  Returns:
+    list: seeds whose concurrent run differs from the isolated run (empty if all runs match).
+  """
+  model_params = model_params or {}
+  seeds = range(n_models)
+  isolated = [run_model(instance_nr, seed, seed, model_params) for seed in seeds]
+
+  switch_interval = sys.getswitchinterval()
+  sys.setswitchinterval(1e-5)                                           # interleave the threads as often as possible
+  try:
+    with ThreadPoolExecutor(max_workers=n_models) as pool:
+      concurrent = list(pool.map(lambda seed: run_model(instance_nr, seed, n_models + seed, model_params), seeds))
+  finally:
+    sys.setswitchinterval(switch_interval)
+
+  return [seed for seed in seeds if isolated[seed] != concurrent[seed]]
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Checks that concurrent models in one process give the same results as isolated runs.")
+  parser.add_argument('--instance', type=int, default=11)
+  parser.add_argument('--models', type=int, default=4)
+  parser.add_argument('--dt', type=float, default=6e-2)
+  parser.add_argument('--agent-velocity', type=float, default=10.)
+  args = parser.parse_args()
+
+  mismatches = check_isolation(args.instance, args.models, {'dt': args.dt, 'agent_velocity': args.agent_velocity})
+  if mismatches:
+    sys.exit(f"Concurrent runs differ from isolated runs for seeds {mismatches}")
+  print(f"{args.models} concurrent models match their isolated runs.")
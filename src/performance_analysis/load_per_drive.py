@@ -1,96 +1,318 @@
-import matplotlib.pyplot as plt
-import numpy as np
-
-
-def process_dispatched_trucks(instance_nr, simu_run):
-  """
-  Processes dispatched truck data and calculates relevant statistics.
-
-  Args:
-    instance_nr: Instance number for simulation run.
-    simu_run: Simulation run number.
-    output_file: Path to the output file for writing results.
-    output_fig: Path to the output figure file (optional).
-  """
-  output_fig = f"./generated_files/{instance_nr}_{simu_run}_truck_loads_plot.png"
-  output_file = f"./generated_files/{instance_nr}_{simu_run}_processed_data.txt"
-  input_filename = f"./generated_files/{instance_nr}_{simu_run}_dispatched_truck_status.txt"
-
-  with open(input_filename, "r") as file:
-    data = file.read()
-  lines = data.strip().split('\n')[1:]
-
-  # Initialize variables
-  truck_loads = []
-  truck_ids = []
-  current_truck_id = current_time_step = None
-  current_volume_sum = 0
-  truck_capacity = 32                                                   # max capacity of all trucks, always is 32
-  total_empty_runs = num_truck_drives = avg_empty_runs = 0
-  max_total_load = percentages = average_percentage = drive_ids = 0
-
-  # Process each line
-  for line in lines:
-    parts = line.split()
-    curr_time_step = int(parts[0])
-    truck_id = int(parts[1])
-
-    # Ignore rows with origin equal to destination
-    if int(parts[2]) != int(parts[3]):
-      volume = int(parts[-1])                                           # Access the last integer as volume
-
-      # Update volume and truck information
-      if (current_truck_id != truck_id and curr_time_step == current_time_step) or curr_time_step != current_time_step:
-        if current_truck_id is not None:
-          truck_loads.append(current_volume_sum)
-          truck_ids.append(current_truck_id)
-        current_truck_id = truck_id
-        current_volume_sum = volume
-        current_time_step = curr_time_step
-      else:
-        current_volume_sum += volume
-
-  # Append the volume sum for the last truck_id
-  if current_truck_id is not None:
-    truck_loads.append(current_volume_sum)
-    truck_ids.append(current_truck_id)
-
-  # Calculate remaining statistics
-  empty_runs = [truck_capacity - load for load in truck_loads]
-  total_empty_runs = sum(empty_runs)
-  num_truck_drives = len(truck_loads)
-  avg_empty_runs = total_empty_runs / num_truck_drives
-
-  # Calculate maximum total load, percentages, and average percentage
-  max_total_load = max(truck_loads)
-  percentages = [load / max_total_load * 100 for load in truck_loads]
-  average_percentage = np.mean(percentages)
-  drive_ids = range(1, len(truck_loads) + 1)
-
-  # Write data to output file
-  with open(output_file, 'w') as file:
-    file.write(f"Number of truck drives: {num_truck_drives}\n")
-    file.write(f"Average empty runs per truck load: {avg_empty_runs:.10f}\n")
-    file.write(f"Maximum total load: {max_total_load}\n")
-    file.write(f"Load per drive: {[load for load in truck_loads]}\n")
-    file.write(f"Average load percentage: {average_percentage:.10f}%\n")
-
-  # Plot data and save figure (optional)
-  if output_fig:
-    plt.figure(figsize=(8, 6))
-    plt.bar(drive_ids, percentages, color='skyblue')
-    plt.title('Total Load per Truck Drive [%]')
-    plt.xlabel('Drive ID')
-    plt.ylabel('Total Load [%]')
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.xticks(drive_ids)  
-
-    # Plot the average line
-    plt.axhline(y=average_percentage, color='red', linestyle='-', label=f'Average Load: {average_percentage:.2f}%')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(output_fig)
-    plt.close("all")
-
-# Example of usage
-# process_dispatched_trucks(instance_nr = 11, simu_run = 1)
+import argparse
+import re
+
+import numpy as np
+
+from source.instance_cache import load_instance
+
+
+def process_dispatched_trucks(instance_nr, simu_run, plot=True, data_set=None):
+  """
+  Processes dispatched truck data and calculates relevant statistics, which are written by `write_statistics`.
+  The empty capacity of a drive is taken from the capacity of its truck in the problem instance (`truck_capacities`).
+
+  Args:
+    instance_nr: Instance number for simulation run.
+    simu_run: Simulation run number.
+    plot: If False, the truck loads figure is not drawn (e.g., for batch runs).
+    data_set: Path of the problem instance file of the run, if it was not run on the bundled instance.
+
+  Returns:
+    dict: Statistics written to the output file (number of drives, average empty runs, maximum total load,
+          load per drive and average load percentage).
+  """
+  input_filename = f"./generated_files/{instance_nr}_{simu_run}_dispatched_truck_status.txt"
+
+  with open(input_filename, "r") as file:
+    data = file.read()
+  lines = data.strip().split('\n')[1:]
+
+  # Initialize variables
+  truck_loads = []
+  truck_ids = []
+  current_truck_id = current_time_step = None
+  current_volume_sum = 0
+  total_empty_runs = num_truck_drives = avg_empty_runs = 0
+  max_total_load = average_percentage = 0
+
+  # Process each line
+  for line in lines:
+    parts = line.split()
+    curr_time_step = int(parts[0])
+    truck_id = int(parts[1])
+
+    # Ignore rows with origin equal to destination
+    if int(parts[2]) != int(parts[3]):
+      volume = int(parts[-1])                                           # Access the last integer as volume
+
+      # Update volume and truck information
+      if (current_truck_id != truck_id and curr_time_step == current_time_step) or curr_time_step != current_time_step:
+        if current_truck_id is not None:
+          truck_loads.append(current_volume_sum)
+          truck_ids.append(current_truck_id)
+        current_truck_id = truck_id
+        current_volume_sum = volume
+        current_time_step = curr_time_step
+      else:
+        current_volume_sum += volume
+
+  # Append the volume sum for the last truck_id
+  if current_truck_id is not None:
+    truck_loads.append(current_volume_sum)
+    truck_ids.append(current_truck_id)
+
+  # Calculate remaining statistics
+  capacities = truck_capacities(instance_nr, data_set)
+  empty_runs = [int(capacities[truck_id]) - load for truck_id, load in zip(truck_ids, truck_loads)]
+  total_empty_runs = sum(empty_runs)
+  num_truck_drives = len(truck_loads)
+  avg_empty_runs = total_empty_runs / num_truck_drives
+
+  # Calculate maximum total load and average percentage
+  max_total_load = max(truck_loads)
+  average_percentage = np.mean([load / max_total_load * 100 for load in truck_loads])
+
+  statistics = {
+    "num_truck_drives": num_truck_drives,
+    "avg_empty_runs": avg_empty_runs,
+    "max_total_load": max_total_load,
+    "load_per_drive": truck_loads,
+    "average_load_percentage": float(average_percentage),
+  }
+  write_statistics(instance_nr, simu_run, statistics, plot)
+  return statistics
+
+
+def write_statistics(instance_nr, simu_run, statistics, plot=True):
+  """
+  Writes load per drive statistics to the processed data file and plots the load per drive (optional).
+  The statistics are either calculated from the dispatched trucks file (`process_dispatched_trucks`),
+  or recorded during the run (`source.recorder.TraceRecorder.statistics`).
+
+  Args:
+    instance_nr: Instance number for simulation run.
+    simu_run: Simulation run number.
+    statistics: Statistics as returned by `process_dispatched_trucks`.
+    plot: If False, the truck loads figure is not drawn (e.g., for batch runs).
+  """
+  output_fig = f"./generated_files/{instance_nr}_{simu_run}_truck_loads_plot.png" if plot else None
+  output_file = f"./generated_files/{instance_nr}_{simu_run}_processed_data.txt"
+
+  truck_loads = statistics["load_per_drive"]
+  max_total_load = statistics["max_total_load"]
+  average_percentage = statistics["average_load_percentage"]
+  percentages = [load / max_total_load * 100 for load in truck_loads]
+  drive_ids = range(1, len(truck_loads) + 1)
+
+  # Write data to output file
+  with open(output_file, 'w') as file:
+    file.write(f"Number of truck drives: {statistics['num_truck_drives']}\n")
+    file.write(f"Average empty runs per truck load: {statistics['avg_empty_runs']:.10f}\n")
+    file.write(f"Maximum total load: {max_total_load}\n")
+    file.write(f"Load per drive: {[load for load in truck_loads]}\n")
+    file.write(f"Average load percentage: {average_percentage:.10f}%\n")
+
+  # Plot data and save figure (optional)
+  if output_fig:
+    import matplotlib.pyplot as plt                                     # imported on first use, headless runs don't plot
+    plt.figure(figsize=(8, 6))
+    plt.bar(drive_ids, percentages, color='skyblue')
+    plt.title('Total Load per Truck Drive [%]')
+    plt.xlabel('Drive ID')
+    plt.ylabel('Total Load [%]')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.xticks(drive_ids)  
+
+    # Plot the average line
+    plt.axhline(y=average_percentage, color='red', linestyle='-', label=f'Average Load: {average_percentage:.2f}%')
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(output_fig)
+    plt.close("all")
+
+
+# Multi-run analysis: loads the dispatched trucks files of many runs into columnar arrays and computes the
+# load per drive statistics of all runs at once, with the same rules as process_dispatched_trucks.
+
+DISPATCH_ROW = re.compile(r'^(\d+) (\d+) (\d+) (\d+) \[.*\] (\d+)', re.MULTILINE)
+
+
+def load_dispatch_traces(instance_nr, simu_runs):
+  """
+  Loads the dispatched trucks files of many runs in one pass into columnar arrays.
+
+  Args:
+    instance_nr: Instance number of the simulation runs.
+    simu_runs: Simulation run numbers.
+
+  Returns:
+    dict: NumPy arrays (one row per dispatch) "run" (index into simu_runs), "step", "truck_id",
+          "start_region", "target_region" and "volume".
+  """
+  runs, rows = [], []
+  for run, simu_run in enumerate(simu_runs):
+    with open(f"./generated_files/{instance_nr}_{simu_run}_dispatched_truck_status.txt", "r") as file:
+      run_rows = DISPATCH_ROW.findall(file.read())
+    runs.append(np.full(len(run_rows), run, dtype=np.int64))
+    rows.extend(run_rows)
+
+  columns = np.array(rows, dtype=np.int64).reshape(-1, 5)
+  return {
+    "run": np.concatenate(runs) if runs else np.zeros(0, dtype=np.int64),
+    "step": columns[:, 0],
+    "truck_id": columns[:, 1],
+    "start_region": columns[:, 2],
+    "target_region": columns[:, 3],
+    "volume": columns[:, 4],
+  }
+
+
+def truck_capacities(instance_nr, data_set=None):
+  """
+  Reads the capacity of every truck from the problem instance of the runs (from the instance cache, if cached).
+
+  Args:
+    instance_nr: Instance number.
+    data_set: Path of the problem instance file of the runs, if they were not run on the bundled instance.
+
+  Returns:
+    np.ndarray: capacity indexed by truck id.
+  """
+  arrays = load_instance(data_set or f"./data_sets/problem_instance_{instance_nr}.json")
+  capacities = np.zeros(int(arrays["truck_id"].max()) + 1, dtype=np.int64)
+  capacities[arrays["truck_id"]] = arrays["truck_capacity"]
+  return capacities
+
+
+def drive_loads(traces, capacities):
+  """
+  Groups dispatches into drives with vectorized operations: rows with origin equal to destination are ignored,
+  and consecutive rows of the same run, step and truck form one drive.
+
+  Args:
+    traces: Columnar dispatch data as returned by load_dispatch_traces.
+    capacities: Capacity indexed by truck id, as returned by truck_capacities.
+
+  Returns:
+    dict: NumPy arrays (one row per drive) "run", "truck_id", "load" and "capacity".
+  """
+  keep = traces["start_region"] != traces["target_region"]
+  run, step, truck_id, volume = (traces[key][keep] for key in ("run", "step", "truck_id", "volume"))
+
+  new_drive = np.ones(len(run), dtype=bool)
+  new_drive[1:] = (run[1:] != run[:-1]) | (step[1:] != step[:-1]) | (truck_id[1:] != truck_id[:-1])
+  drive = np.cumsum(new_drive) - 1
+
+  return {
+    "run": run[new_drive],
+    "truck_id": truck_id[new_drive],
+    "load": np.bincount(drive, weights=volume, minlength=int(new_drive.sum())).astype(np.int64),
+    "capacity": capacities[truck_id[new_drive]],
+  }
+
+
+def summarize_runs(instance_nr, simu_runs, data_set=None):
+  """
+  Computes the load per drive statistics of many runs at once, and their distribution across the runs.
+
+  Args:
+    instance_nr: Instance number of the simulation runs.
+    simu_runs: Simulation run numbers.
+    data_set: Path of the problem instance file of the runs (`TransportationModel` data_set), None for the bundled instance.
+
+  Returns:
+    dict: per run arrays (index as in simu_runs) "num_truck_drives", "avg_empty_runs", "max_total_load" and
+          "average_load_percentage", and "distribution" with mean, std, min, 5/50/95th percentile and max of every statistic.
+  """
+  drives = drive_loads(load_dispatch_traces(instance_nr, simu_runs), truck_capacities(instance_nr, data_set))
+  n_runs = len(simu_runs)
+  run, load = drives["run"], drives["load"]
+
+  num_truck_drives = np.bincount(run, minlength=n_runs)
+  empty_runs = np.bincount(run, weights=drives["capacity"] - load, minlength=n_runs)
+  max_total_load = np.zeros(n_runs, dtype=np.int64)
+  np.maximum.at(max_total_load, run, load)
+  percentages = load / np.maximum(max_total_load[run], 1) * 100
+  with np.errstate(invalid='ignore', divide='ignore'):
+    statistics = {
+      "num_truck_drives": num_truck_drives,
+      "avg_empty_runs": empty_runs / num_truck_drives,
+      "max_total_load": max_total_load,
+      "average_load_percentage": np.bincount(run, weights=percentages, minlength=n_runs) / num_truck_drives,
+    }
+
+  statistics["distribution"] = {
+    name: {
+      "mean": float(np.nanmean(values)),
+      "std": float(np.nanstd(values)),
+      "min": float(np.nanmin(values)),
+      "p5": float(np.nanpercentile(values, 5)),
+      "p50": float(np.nanpercentile(values, 50)),
+      "p95": float(np.nanpercentile(values, 95)),
+      "max": float(np.nanmax(values)),
+    }
+    for name, values in statistics.items()
+  }
+  return statistics
+
+
+def write_run_distributions(instance_nr, simu_runs, statistics, plot=True):
+  """
+  Writes the statistics of every run and their distribution to a file, and plots the distribution
+  of the average load percentage across runs (optional).
+
+  Args:
+    instance_nr: Instance number of the simulation runs.
+    simu_runs: Simulation run numbers.
+    statistics: Statistics as returned by summarize_runs.
+    plot: If False, the figure is not drawn.
+  """
+  output_file = f"./generated_files/{instance_nr}_runs_processed_data.txt"
+  output_fig = f"./generated_files/{instance_nr}_runs_load_distribution.png" if plot else None
+  names = ("num_truck_drives", "avg_empty_runs", "max_total_load", "average_load_percentage")
+
+  with open(output_file, 'w') as file:
+    file.write("simu_run " + " ".join(names) + "\n")
+    for run, simu_run in enumerate(simu_runs):
+      file.write(f"{simu_run} " + " ".join(f"{statistics[name][run]:g}" for name in names) + "\n")
+    file.write("\n")
+    for name in names:
+      summary = statistics["distribution"][name]
+      file.write(f"{name}: " + ", ".join(f"{key} {value:.4f}" for key, value in summary.items()) + "\n")
+
+  if output_fig:
+    import matplotlib.pyplot as plt
+    average_percentage = statistics["distribution"]["average_load_percentage"]["mean"]
+    plt.figure(figsize=(8, 6))
+    plt.hist(statistics["average_load_percentage"], bins=30, color='skyblue')
+    plt.title(f'Average Load per Truck Drive of {len(simu_runs)} Runs [%]')
+    plt.xlabel('Average Load [%]')
+    plt.ylabel('Runs')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.axvline(x=average_percentage, color='red', linestyle='-', label=f'Mean: {average_percentage:.2f}%')
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(output_fig)
+    plt.close("all")
+
+
+# Example of usage
+# process_dispatched_trucks(instance_nr = 11, simu_run = 1)
+# process_dispatched_trucks(instance_nr = 0, simu_run = 1, data_set = "./generated_files/problem_instance_0.json")
+#
+# Multi-run analysis from the src folder, e.g. of the dispatched trucks files of batch runs (--trace-level dispatches):
+#   python -m performance_analysis.load_per_drive --instance 180 --runs 0-499
+#   python -m performance_analysis.load_per_drive --instance 0 --runs 0-99 --data-set ./generated_files/problem_instance_0.json
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Load per drive statistics of many simulation runs.")
+  parser.add_argument('--instance', type=int, required=True)
+  parser.add_argument('--runs', required=True, help="inclusive range of simulation runs, e.g. 0-499")
+  parser.add_argument('--data-set', default=None, help="path of the problem instance file of the runs, if not the bundled instance")
+  parser.add_argument('--no-plot', action='store_true')
+  args = parser.parse_args()
+
+  first, _, last = args.runs.partition('-')
+  simu_runs = list(range(int(first), int(last or first) + 1))
+  statistics = summarize_runs(args.instance, simu_runs, args.data_set)
+  write_run_distributions(args.instance, simu_runs, statistics, not args.no_plot)
+  print(f"{len(simu_runs)} runs written to ./generated_files/{args.instance}_runs_processed_data.txt")
@@ -0,0 +1,116 @@
+"""
+Memory benchmark of the order representation.
+
+Creates N orders (default 10^5) in a model, once as `OrderAgent` (slots, role flags in one int, only counted in the lane
+index) and once as a replica of the previous representation (mesa-style agent with a per-order __dict__ and one attribute
+per role flag), and compares the memory allocated per order, including the entries of the orders in the scheduler and in
+the lane index. Also measures the construction of a whole model on a synthetic instance with N orders. Run from the src folder:
+  python -m performance_analysis.memory_benchmark --orders 100000
+"""
+
+import argparse
+import gc
+import heapq
+import os
+import tracemalloc
+from collections import defaultdict
+
+import source.generator as gen
+from source.agents import OrderAgent
+from source.model import TransportationModel
+from source.parent import Order
+
+MODEL_PARAMS = {'trace_level': 'none', 'plot': False}
+
+
+class LegacyOrderAgent():
+  """
+  Replica of the previous order representation: the attributes of `mesa.Agent` and of the previous `OrderAgent`,
+  and an entry in the previous lane index of the model (min-heap of (volume, order_id, order) per lane,
+  `model.legacy_lane_heaps`).
+  """
+
+  def __init__(self, model, parsed_order) -> None:
+    self.unique_id = model.next_id()
+    self.model = model
+    self.pos = None
+    self.order_id = parsed_order.id
+    self.origin = parsed_order.origin
+    self.destination = parsed_order.destination
+    self.volume = parsed_order.volume
+    self.timer = 10
+    self.delivered = False
+    self.placed = False
+    self.truck = None
+    self.request = False
+    self.req_t = None
+    self.OB = self.SB = self.EB = False
+
+    heapq.heappush(model.legacy_lane_heaps[(self.origin, self.destination)], (self.volume, self.order_id, self))
+    model.schedule.add(self)
+
+
+def allocated(create):
+  """
+  Measures the memory allocated by a function and kept alive by its result.
+
+  Returns:
+    tuple: result of the function and the allocated bytes.
+  """
+  gc.collect()
+  tracemalloc.start()
+  try:
+    result = create()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+  finally:
+    tracemalloc.stop()
+  return result, size
+
+
+def order_memory(order_class, n_orders, seed=0):
+  """
+  Measures the bytes per order of an order representation.
+
+  Args:
+    order_class: OrderAgent or LegacyOrderAgent.
+    n_orders: Number of orders.
+    seed: Seed of the generated orders.
+
+  Returns:
+    float: allocated bytes per order.
+  """
+  model = TransportationModel(instance_number=11, **MODEL_PARAMS)
+  model.legacy_lane_heaps = defaultdict(list)                          # lane index of the replica, as the previous model.lane_index
+  instance = gen.generate_instance(0, n_trucks=0, n_orders=n_orders, seed=seed)
+  parsed_orders = [Order(n_orders + o['orderId'], o['origin'], o['destination'], o['volume']) for o in instance['orders']]
+  orders, size = allocated(lambda: [order_class(model, parsed_order) for parsed_order in parsed_orders])
+  return size / len(orders)
+
+
+def model_memory(n_orders, n_trucks, seed=0, data_dir='generated_files/benchmark'):
+  """
+  Measures the memory of a model constructed on a synthetic instance.
+
+  Returns:
+    float: allocated bytes of the model.
+  """
+  os.makedirs(data_dir, exist_ok=True)
+  path = f'{data_dir}/problem_instance_memory_{n_orders}.json'
+  gen.write_instance(gen.generate_instance(0, n_trucks=n_trucks, n_orders=n_orders, seed=seed), path)
+  TransportationModel(instance_number=0, data_set=path, **MODEL_PARAMS)                # fills the instance cache
+  _, size = allocated(lambda: TransportationModel(instance_number=0, data_set=path, **MODEL_PARAMS))
+  return size
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Compares the memory of the order representation with the previous one.")
+  parser.add_argument('--orders', type=int, default=100000)
+  parser.add_argument('--trucks', type=int, default=1000)
+  args = parser.parse_args()
+
+  legacy = order_memory(LegacyOrderAgent, args.orders)
+  compact = order_memory(OrderAgent, args.orders)
+  print(f"{args.orders} orders: previous representation {legacy:.0f} B/order ({legacy * args.orders / 2**20:.1f} MB), "
+        f"OrderAgent {compact:.0f} B/order ({compact * args.orders / 2**20:.1f} MB), {1 - compact / legacy:.0%} less")
+  print(f"model with {args.trucks} trucks and {args.orders} orders: {model_memory(args.orders, args.trucks) / 2**20:.1f} MB")
@@ -0,0 +1,92 @@
+"""
+Statistical comparison of the batched onlooker bee (OB) phase (`batch_onlookers=True`) with the per-order OB phase.
+
+The batched mode resolves all orders of a lane when its first order is activated, which changes the activation order
+of the orders (see `abc.OB_Phase_lane`), so single runs differ. This script runs the same seeds in both modes and compares
+the mean steps until completion, truck drives and average load percentage, with the 95% interval of the difference of the
+means (Welch). Instances are bundled instance numbers or synthetic instances "{regions}:{trucks}:{orders}[:{lane skew}]".
+Run from the src folder:
+  python -m performance_analysis.onlooker_comparison --instances 4:20:500 3:20:6000:2 --seeds 0-29 --event-driven
+"""
+
+import argparse
+import math
+import os
+import statistics
+
+import source.generator as gen
+from source.batch import parse_seeds, run_batch
+
+METRICS = ('steps', 'num_truck_drives', 'average_load_percentage')
+SYNTHETIC_DIR = 'generated_files/benchmark'
+
+
+def instance_case(spec, output_dir=SYNTHETIC_DIR):
+  """
+  Returns the instance number and the instance file of a bundled instance number or a synthetic instance spec.
+
+  Returns:
+    tuple: instance number and data set path (None for bundled instances).
+  """
+  if ':' not in spec:
+    return int(spec), None
+  values = spec.split(':')
+  n_regions, n_trucks, n_orders = (int(value) for value in values[:3])
+  lane_skew = float(values[3]) if len(values) > 3 else 0.
+  os.makedirs(output_dir, exist_ok=True)
+  path = f'{output_dir}/problem_instance_{spec.replace(":", "_")}.json'
+  gen.write_instance(gen.generate_instance(0, n_regions, n_trucks, n_orders, lane_skew=lane_skew, seed=0), path)
+  return 0, path
+
+
+def compare(per_order, batched):
+  """
+  Compares the runs of both modes for every metric.
+
+  Args:
+    per_order: Statistics of the runs with the per-order OB phase (`batch.run_batch`).
+    batched: Statistics of the runs with the batched OB phase, same seeds.
+
+  Returns:
+    dict: means of both modes, difference of the means and its 95% interval, the number of seeds whose runs differ
+          (loads per drive in dispatch order) and the number of seeds whose runs dispatch other loads (in any order).
+  """
+  comparison = {}
+  for metric in METRICS:
+    a = [run[metric] for run in per_order]
+    b = [run[metric] for run in batched]
+    se = math.sqrt(statistics.variance(a) / len(a) + statistics.variance(b) / len(b)) if len(a) > 1 else float('nan')
+    difference = statistics.mean(b) - statistics.mean(a)
+    comparison[metric] = {
+      "per_order": statistics.mean(a),
+      "batched": statistics.mean(b),
+      "difference": difference,
+      "interval": (difference - 1.96 * se, difference + 1.96 * se),
+    }
+  comparison["differing_runs"] = sum(x["load_per_drive"] != y["load_per_drive"] for x, y in zip(per_order, batched))
+  comparison["differing_loads"] = sum(sorted(x["load_per_drive"]) != sorted(y["load_per_drive"]) for x, y in zip(per_order, batched))
+  return comparison
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Compares the statistics of the batched OB phase with the per-order OB phase.")
+  parser.add_argument('--instances', nargs='+', default=['4:20:500', '3:20:6000:2'], help='bundled instance numbers or regions:trucks:orders[:lane skew]')
+  parser.add_argument('--seeds', nargs='+', default=['0-29'])
+  parser.add_argument('--event-driven', action='store_true')
+  parser.add_argument('--workers', type=int, default=None)
+  args = parser.parse_args()
+
+  seeds = parse_seeds(args.seeds)
+  for spec in args.instances:
+    instance_nr, data_set = instance_case(spec)
+    model_params = {'dt': 6e-2, 'agent_velocity': 10., 'event_driven': args.event_driven, 'data_set': data_set}
+    per_order = run_batch([instance_nr], seeds, {**model_params, 'batch_onlookers': False}, args.workers)
+    batched = run_batch([instance_nr], seeds, {**model_params, 'batch_onlookers': True}, args.workers)
+    comparison = compare(per_order, batched)
+    print(f"{spec}: {comparison['differing_runs']} of {len(seeds)} runs differ, "
+          f"{comparison['differing_loads']} of them in the loads of their drives")
+    for metric in METRICS:
+      result = comparison[metric]
+      low, high = result["interval"]
+      print(f"  {metric:<24} per-order {result['per_order']:9.2f}  batched {result['batched']:9.2f}  "
+            f"difference {result['difference']:+8.2f} [{low:+.2f}, {high:+.2f}]")
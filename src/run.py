@@ -1,3 +1,5 @@
-from source.server import server
-
-server.launch()
+from source.server import create_server
+
+instance_number = input("Choose problem instance number 11, 139 or 180: ")
+server = create_server(instance_number)
+server.launch()
@@ -1,162 +1,265 @@
-"""Module defining functions specific to the ABC algorithm implementation."""
-
-import random
-import source.helperOrder as hp
-
-
-def calculate_objective(O_EB, truck) -> float:
-    """Calculates an objective function value for assigning an Eastbound (EB) order to a truck.
-
-    This function takes an employed bee order (`O_EB`) and a truck (`truck`) as input. It calculates a
-    weighted objective function value that considers three factors:
-
-    1. **Objective Load:** (higher weight `w_1`)
-        - Calculated as the remaining capacity of the truck (capacity - total load on the truck).
-
-    2. **Objective Position (Currently Unused):** (weight `w_2`)
-        - Calculated as the absolute distance between the truck's starting region and the order's origin
-        - A smaller distance is generally preferred.
-
-    3. **Objective Availability (Currently Unused):** (weight `w_3`)
-        - It's intended to represent a measure of truck availability, i.e., in what time (steps) will the truck become available deliver orders
-        - This part of the function is currently assuming only imediately available trucks (`objective_availability = 0`)
-
-    Args:
-        O_EB (OrderAgent): order employed (loaded) at this truck
-        truck (TruckAgent): truck which needs its objective value calculated
-
-    **Note:** The weights `w_1`, `w_2`, and `w_3` can be adjusted to prioritize different factors based on the specific problem requirements.
-    Returns:
-        float: The calculated objective function value.
-    """    
-    total_load = sum(order.volume for order in truck.load)
-    w_1 = 1
-    w_2 = 0
-    w_3 = 0
-
-    objective_load = truck.capacity - total_load
-    objective_position = abs(truck.start_region - O_EB.origin)
-    if O_EB.origin == truck.start_region:                  
-        objective_availability = 0
-
-    objective_func = round((w_1 * objective_load  + w_2 * objective_position + w_3 * objective_availability), 4)
-
-    return objective_func
-
-def calculate_fitness(O_EB):
-    """calculates fitness according to the formula in the ABC description
-
-    Args:
-        O_EB (OrderAgent): order with EB flag, this order needs to calculate fitness of an assigned truck 
-    """    
-    truck = O_EB.truck
-    truck.objective = calculate_objective(O_EB, truck)
-    if truck.objective > 0:
-        truck.fitness =  round(1 / (1 + truck.objective), 4)
-    else:
-        truck.fitness = 0
-
-def calculate_probability(max_fit_EB, EBs_in_trucks_with_space) -> float:
-    """Calculates the probability of a truck being selected based on its fitness value.
-
-    Args:
-        max_fit_EB (OrderAgent): order with EB flag that's loaded to a truck with highest fitness value
-        EBs_in_trucks_with_space (list[OrderAgents]): other EB orders loaded to other trucks that still have space for other orders
-
-    Returns:
-        float: Probability with which will onlooker bee (OB) order choose the best (fitness) advertized truck
-    """    
-    Pr = None
-    Pr = max_fit_EB.fitness / sum(EB.fitness for EB in EBs_in_trucks_with_space)
-    return Pr
-
-def become_EB(order) -> None:
-    """Assumes order came from SB phase (with SB status) and therefore upon truck selection becomes employed by this truck (food source),
-      i.e., changes its status to order.EB = True (employed bee).
-      This order will hold all truck information, so that other orders (bees) access the information from employed bee (EB) order:
-      truck's fitness, load, and capacity
-
-    Args:
-        order (OrderAgent): order that becomes employed by this truck (order.EB = True)
-    """    
-    calculate_fitness(order)
-    order.EB = True
-    order.fitness = order.truck.fitness     
-    order.load = order.truck.load.copy() if order.truck.load else []
-    order.capacity = order.truck.capacity   
-
-    
-def SB_Phase(order, possible_trucks, unsorted_Os) -> None:
-    """Implements Scout Bee (SB) Phase of the ABC algorithm to assign a truck to an order.
-
-    This function takes an `OrderAgent` object, a list of possible trucks, and a list of unsorted orders
-    as input. It attempts to assign a truck to the order based on the SB phase logic.
-
-    1. **Check for Possible Trucks:**
-        - If the `possible_trucks` list is empty, it means there are no available trucks for the order's
-          destination, at this simulation step. In this case, the order is appended to the `unsorted_Os` list, to try at the next simu step.
-
-    2. **Iterate Through Possible Trucks:**
-        - If `possible_trucks` is not empty, a random truck is chosen
-        - The total volume of orders currently loaded on the chosen truck is calculated
-
-    3. **Check Truck Capacity:**
-        - If the total volume plus the order's volume is less than or equal to the truck's capacity:
-            - The `hp.assign_truck` function is called to assign the truck to the order.
-            - If none of the existing orders on the truck have the "EB" (Employed Bee) order, the `become_EB`
-              function is called, to label this order as the new employed bee (order.EB = True) of this truck (food source)
-            - The loop is broken since a truck has been assigned.
-
-    4. **Remove Truck Without Capacity:**
-        - If the total volume exceeds the truck's capacity, the chosen truck is removed from the `possible_trucks` list
-          to avoid considering it again. The loop continues to the next truck.
-
-    5. **Empty Trucks from Same Origin (if an order came from OB phase in agents.py):**
-        - If there were no possible trucks initially (no possible trucks of same origin and destination)
-        - There might be trucks with the same origin that are empty.
-        - It retrieves all trucks with the same origin as the order using `hp.trucks_with_same_origin`
-        - It then filters those trucks to find empty ones using `hp.empty_trucks_with_same_origin`
-        - If there are empty trucks with the same origin:
-            - A random empty truck is chosen from the list.
-            - The `hp.assign_truck` function is called to assign this empty truck to the order.
-        - If there are no empty trucks with the same origin, the order is appended to the `unsorted_Os` list.
-
-    6. **Unsorted Orders:**
-        - If no suitable truck is found in either scenario (trucks with same origin and destination or empty trucks from same origin),
-          the order is appended to the `unsorted_Os` list, indicating it couldn't be assigned during this simulation step 
-          (e.g. no space in truck load or no trucks at order.region).
-
-    Args:
-        order (OrderAgent): The order for which a truck needs to be assigned.
-        possible_trucks (list[TruckAgent]): A list of possible trucks with the same destination as the order.
-        unsorted_Os (list[OrderAgent]): A list to store unsorted or unassigned orders.
-
-    Returns:
-        None
-    """
-    
-    if possible_trucks:
-        while possible_trucks:
-            rnd_truck = random.choice(possible_trucks)
-            total_volume = sum(o.volume for o in rnd_truck.load)
-
-            if total_volume + order.volume <= rnd_truck.capacity:
-                hp.assign_truck(order, rnd_truck)
-                if not any(o.EB for o in rnd_truck.load):
-                    become_EB(order)                            
-                break
-            else:
-                possible_trucks.remove(rnd_truck)
-        else:
-            trucks_with_same_origin = hp.trucks_with_same_origin(order, order.model.trucks)
-            empty_trucks_with_same_origin = hp.empty_trucks_with_same_origin(trucks_with_same_origin)
-            if empty_trucks_with_same_origin:
-                rnd_truck = random.choice(empty_trucks_with_same_origin)
-                hp.assign_truck(order, rnd_truck)
-            else:
-                unsorted_Os.append(order)
-
-    else:
-        unsorted_Os.append(order)
-
-
+"""Module defining functions specific to the ABC algorithm implementation."""
+
+import numpy as np
+
+import source.helperOrder as hp
+
+
+def calculate_objective(O_EB, truck) -> float:
+    """Calculates an objective function value for assigning an Eastbound (EB) order to a truck.
+
+    This function takes an employed bee order (`O_EB`) and a truck (`truck`) as input. It calculates a
+    weighted objective function value that considers three factors:
+
+    1. **Objective Load:** (higher weight `w_1`)
+        - Calculated as the remaining capacity of the truck (capacity - total load on the truck).
+
+    2. **Objective Position (Currently Unused):** (weight `w_2`)
+        - Calculated as the absolute distance between the truck's starting region and the order's origin
+        - A smaller distance is generally preferred.
+
+    3. **Objective Availability (Currently Unused):** (weight `w_3`)
+        - It's intended to represent a measure of truck availability, i.e., in what time (steps) will the truck become available deliver orders
+        - This part of the function is currently assuming only imediately available trucks (`objective_availability = 0`),
+          also for a truck that is not (yet) in the origin region of the order
+
+    Args:
+        O_EB (OrderAgent): order employed (loaded) at this truck
+        truck (TruckAgent): truck which needs its objective value calculated
+
+    **Note:** The weights `w_1`, `w_2`, and `w_3` (`model.objective_weights`, parameters of `TransportationModel`) can be adjusted
+    to prioritize different factors based on the specific problem requirements.
+    Returns:
+        float: The calculated objective function value.
+    """    
+    total_load = truck.load_volume
+    w_1, w_2, w_3 = truck.model.objective_weights
+
+    objective_load = truck.capacity - total_load
+    objective_position = abs(truck.start_region - O_EB.origin)
+    objective_availability = 0
+
+    objective_func = round((w_1 * objective_load  + w_2 * objective_position + w_3 * objective_availability), 4)
+
+    return objective_func
+
+def calculate_fitness(O_EB) -> float:
+    """calculates fitness according to the formula in the ABC description.
+    The fitness is cached in the truck (`truck.objective`, `truck.fitness`) until the load of the truck changes, which resets
+    `truck.fitness` to None (`helperOrder.assign_truck`, `helperTruck.empty_truck_load`).
+
+    Args:
+        O_EB (OrderAgent): order with EB flag, this order needs to calculate fitness of an assigned truck 
+
+    Returns:
+        float: fitness of the truck
+    """    
+    truck = O_EB.truck
+    if truck.fitness is None:
+        truck.objective = calculate_objective(O_EB, truck)
+        if truck.objective > 0:
+            truck.fitness =  round(1 / (1 + truck.objective), 4)
+        else:
+            truck.fitness = 0
+    return truck.fitness
+
+
+class Advertisement():
+    """Read-only advertisement of an employed bee (EB) order about its truck (food source): the fitness (`calculate_fitness`),
+    the free capacity and the (origin, destination) lane of the truck.
+    Onlooker bees (OB) read the advertisement of the EB instead of the truck, and the advertisement reads the current state
+    of the truck when it's accessed, so that the EB doesn't hold a copy of the truck's load that is updated on every assignment.
+    """
+    __slots__ = ('_EB',)
+
+    def __init__(self, EB) -> None:
+        self._EB = EB
+
+    @property
+    def fitness(self) -> float:
+        return calculate_fitness(self._EB)
+
+    @property
+    def free_capacity(self) -> int:
+        return self._EB.truck.free_capacity
+
+    @property
+    def lane(self) -> tuple:
+        return (self._EB.origin, self._EB.destination)
+
+def calculate_probability(max_fit_EB, EBs_in_trucks_with_space) -> float:
+    """Calculates the probability of a truck being selected based on its fitness value.
+
+    Args:
+        max_fit_EB (OrderAgent): order with EB flag that's loaded to a truck with highest fitness value
+        EBs_in_trucks_with_space (list[OrderAgents]): other EB orders loaded to other trucks that still have space for other orders
+
+    Returns:
+        float: Probability with which will onlooker bee (OB) order choose the best (fitness) advertized truck
+    """    
+    Pr = None
+    Pr = max_fit_EB.advertisement.fitness / sum(EB.advertisement.fitness for EB in EBs_in_trucks_with_space)
+    return Pr
+
+def OB_Phase_lane(orders, trucks, pending) -> None:
+    """Implements the Onlooker Bee (OB) phase of the ABC algorithm for all orders waiting on the same (origin, destination) lane
+    at once (batched ABC mode, `model.batch_onlookers`), with the decision rule of the OB phase in `OrderAgent.step`.
+
+    The advertisements of the employed bees (EB) of the trucks on the lane (`Advertisement`: fitness and free capacity) are read
+    once as arrays. For all orders, the candidate EBs (truck with space for the order) are evaluated as an (orders x EBs) array:
+    the orders up to the first order with a candidate wait in the `pending` queue, as in their own step. The first order with
+    a candidate chooses the EB with the highest fitness with the probability `calculate_probability`, otherwise it enters the
+    SB phase (`SB_Phase`), and the candidates of the following orders are evaluated again if the free capacity of an EB truck
+    changed (or the advertisements are read again, if a new EB was employed). Orders are resolved in their order.
+
+    **Note:** the batched mode changes the activation order of the orders: the whole lane is resolved when its first order is
+    activated, so its random draws come before the draws of orders of other lanes activated in between, and its orders take
+    the shared empty trucks of the origin region before those orders. The runs thus differ from the per-order OB phase;
+    their statistics are compared by `performance_analysis.onlooker_comparison`.
+
+    Args:
+        orders (list[OrderAgent]): unplaced orders of the lane that are not pending, ordered by unique id
+        trucks (list[TruckAgent]): trucks in the origin region carrying orders to the destination (`helperOrder.trucks_with_same_destination`)
+        pending (PendingOrders): The queue of unassigned orders of the model (`model.pending`).
+
+    Returns:
+        None
+    """
+    model = orders[0].model
+    volumes = np.array([order.volume for order in orders])
+    j = 0
+    while j < len(orders):
+        EBs = [order for truck in trucks for order in truck.load if order.EB]
+        if not EBs:                                             # no advertisement on the lane
+            for order in orders[j:]:
+                pending.add(order)
+            return
+        fitness = np.array([EB.advertisement.fitness for EB in EBs], dtype=float)
+        free = np.array([EB.advertisement.free_capacity for EB in EBs])
+        EB_index = {EB.truck: i for i, EB in enumerate(EBs)}
+
+        new_EB = False
+        while j < len(orders) and not new_EB:
+            space = volumes[j:, None] <= free[None, :]          # space[k, i]: truck of EB i has space for order j + k
+            with_space = np.flatnonzero(space.any(axis=1))
+            first = j + with_space[0] if with_space.size else len(orders)
+            for order in orders[j:first]:                       # no EB truck with space
+                pending.add(order)
+            if first == len(orders):
+                return
+
+            order = orders[first]
+            candidates = space[first - j]
+            max_fit = np.where(candidates, fitness, -np.inf).argmax()  # first EB with the highest fitness, as max()
+            Pr_max_fit = fitness[max_fit] / fitness[candidates].sum()
+            transitions = model.transitions
+            accept = Pr_max_fit > model.random.random()
+            if model.profiler is not None:
+                model.profiler.counters['ob_accept' if accept else 'ob_reject'] += 1
+            if accept:
+                hp.assign_truck(order, EBs[max_fit].truck)
+            else:
+                SB_Phase(order, hp.trucks_with_same_destination(order), pending)
+                new_EB = order.EB
+
+            if order.placed and order.truck in EB_index:         # load of an EB truck changed
+                i = EB_index[order.truck]
+                free[i], fitness[i] = EBs[i].advertisement.free_capacity, EBs[i].advertisement.fitness
+            if model.transitions == transitions:
+                pending.add(order)
+                if model.profiler is not None:
+                    model.profiler.counters['unplaceable_retries'] += 1
+            j = first + 1
+        trucks = hp.trucks_with_same_destination(orders[0])
+
+
+def become_EB(order) -> None:
+    """Assumes order came from SB phase (with SB status) and therefore upon truck selection becomes employed by this truck (food source),
+      i.e., changes its status to order.EB = True (employed bee).
+      This order advertises the truck information (`Advertisement`), so that other orders (bees) access the information from employed bee (EB) order:
+      truck's fitness, free capacity, and lane
+
+    Args:
+        order (OrderAgent): order that becomes employed by this truck (order.EB = True)
+    """    
+    order.EB = True
+    order.advertisement = Advertisement(order)
+
+    
+def SB_Phase(order, possible_trucks, pending) -> None:
+    """Implements Scout Bee (SB) Phase of the ABC algorithm to assign a truck to an order.
+
+    This function takes an `OrderAgent` object, a list of possible trucks, and the pending-order queue of the model
+    as input. It attempts to assign a truck to the order based on the SB phase logic.
+
+    1. **Check for Possible Trucks:**
+        - If the `possible_trucks` list is empty, it means there are no available trucks for the order's
+          destination, at this simulation step. In this case, the order is added to the `pending` queue, to try again once it's woken.
+
+    2. **Iterate Through Possible Trucks:**
+        - If `possible_trucks` is not empty, a random truck is chosen
+
+    3. **Check Truck Capacity:**
+        - If the order's volume is less than or equal to the free capacity of the truck (`truck.free_capacity`):
+            - The `hp.assign_truck` function is called to assign the truck to the order.
+            - If none of the existing orders on the truck have the "EB" (Employed Bee) order, the `become_EB`
+              function is called, to label this order as the new employed bee (order.EB = True) of this truck (food source)
+            - The loop is broken since a truck has been assigned.
+
+    4. **Remove Truck Without Capacity:**
+        - If the total volume exceeds the truck's capacity, the chosen truck is removed from the `possible_trucks` list
+          to avoid considering it again. The loop continues to the next truck.
+
+    5. **Empty Trucks from Same Origin (if an order came from OB phase in agents.py):**
+        - If there were no possible trucks initially (no possible trucks of same origin and destination)
+        - There might be trucks with the same origin that are empty.
+        - It retrieves the empty trucks in the origin region of the order using `hp.empty_trucks_with_same_origin`
+        - If there are empty trucks with the same origin:
+            - A random empty truck is chosen from the list.
+            - The `hp.assign_truck` function is called to assign this empty truck to the order.
+        - If there are no empty trucks with the same origin, the order is added to the `pending` queue.
+
+    6. **Unsorted Orders:**
+        - If no suitable truck is found in either scenario (trucks with same origin and destination or empty trucks from same origin),
+          the order is added to the `pending` queue, indicating it couldn't be assigned during this simulation step 
+          (e.g. no space in truck load or no trucks at order.region).
+
+    Args:
+        order (OrderAgent): The order for which a truck needs to be assigned.
+        possible_trucks (list[TruckAgent]): A list of possible trucks with the same destination as the order.
+        pending (PendingOrders): The queue of unassigned orders of the model (`model.pending`).
+
+    Returns:
+        None
+    """
+    profiler = order.model.profiler
+    if profiler is not None:
+        start = profiler.clock()
+
+    if possible_trucks:
+        while possible_trucks:
+            rnd_truck = order.model.random.choice(possible_trucks)
+            if order.volume <= rnd_truck.free_capacity:
+                hp.assign_truck(order, rnd_truck)
+                if not any(o.EB for o in rnd_truck.load):
+                    become_EB(order)                            
+                break
+            else:
+                possible_trucks.remove(rnd_truck)
+        else:
+            if profiler is not None:
+                profiler.counters['sb_fallback'] += 1
+            empty_trucks_with_same_origin = hp.empty_trucks_with_same_origin(order)
+            if empty_trucks_with_same_origin:
+                rnd_truck = order.model.random.choice(empty_trucks_with_same_origin)
+                hp.assign_truck(order, rnd_truck)
+            else:
+                pending.add(order)
+
+    else:
+        pending.add(order)
+
+    if profiler is not None:
+        profiler.add('scout_phase', start)
+
+
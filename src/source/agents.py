@@ -1,243 +1,313 @@
-"""Module defining agents (init) and their behavior (step)."""
-
-import mesa
-import numpy as np
-import random
-
-import source.helperOrder as ho
-import source.helperTruck as ht
-import source.abc as abc
-import source.file as fl
-
-
-class BackgroundAgent(mesa.Agent):
-    def __init__(self, unique_id: int, model, pos) -> None:
-        super().__init__(unique_id, model)
-        self.pos = pos
-        self.layer = 0
-        self.size = model.space_size
-
-        model.space.place_agent(self, pos)
-        model.schedule.add(self)
-
-
-class RegionAgent(mesa.Agent):
-    position = [(17.0, 5.0), (29.0, 13.0), (39.0, 34.0), (3.0, 26.0)]
-    KLF = position[0]
-    GRZ = position[1]
-    WIE = position[2]
-    SLZ = position[3]
-
-    def __init__(self, model, parsed_region) -> None:
-        super().__init__(model.next_id(), model)    
-        # parsed vars:
-        self.name = parsed_region.name
-        self.region_id = parsed_region.id
-        self.pos = RegionAgent.get_position(self, self.region_id)
-
-    def get_position(agent, region_id)  -> tuple:
-        """returns coordinates of the region id, mainly for visualization
-
-        Args:
-            agent (TruckAgent, RegionAgent): instance requiring region coordinates
-            region_id (int): id of the assigned region
-
-        Returns:
-            tuple: (x, y) coordinates
-        """        
-        pos = None
-        if region_id == 1:
-            pos = RegionAgent.KLF
-        elif region_id == 2:
-            pos = RegionAgent.GRZ
-        elif region_id == 3:
-            pos = RegionAgent.WIE
-        elif region_id == 4:
-            pos = RegionAgent.SLZ
-
-        return pos
-        
-
-
-class FreighterAgent(mesa.Agent):
-    def __init__(self, model, parsed_freighter) -> None:
-        super().__init__(model.next_id(), model)
-        # parsed vars:
-        self.freighter_id = parsed_freighter.id
-        self.name = parsed_freighter.name
-        self.trucks = parsed_freighter.trucks
-
-        model.schedule.add(self)
-
-class OrderAgent(mesa.Agent):
-        unsorted_Os = []
-
-        def __init__(self, model, parsed_order) -> None:
-            super().__init__(model.next_id(), model)
-            # parsed vars:
-            self.order_id = parsed_order.id
-            self.origin = parsed_order.origin
-            self.destination = parsed_order.destination
-            self.volume = parsed_order.volume
-            self.timer = 10
-
-            # simu-related vars
-            self.delivered = False
-            self.placed = False
-            self.truck = None
-            self.request = False
-            self.req_t = None
-
-            # ABC related vars
-            self.OB = self.SB = self.EB = False
-
-            model.schedule.add(self)
-
-            # simu-related funcs in helperOrder.py
-
-            
-        def step(self):
-            trucks_with_same_origin = trucks_with_same_destination = empty_trucks_with_same_origin = []
-            EBs_in_trucks = EBs_in_trucks_with_space = []
-            max_fit_EB = None
-            Pr_max_fit = rnd_num = 0
-            if not self.placed:
-                # prepare for the ABC loop:
-                trucks_with_same_origin = ho.trucks_with_same_origin(self, self.model.trucks)
-                if trucks_with_same_origin:                    
-                    trucks_with_same_destination = ho.trucks_with_same_destination(self, trucks_with_same_origin)
-                    if not trucks_with_same_destination:
-                        empty_trucks_with_same_origin = ho.empty_trucks_with_same_origin(trucks_with_same_origin)
-
-                # start the ABC loop
-                if not trucks_with_same_origin:
-                    if not self.request:          
-                        available_trucks = [truck for truck in self.model.trucks if (truck.start_region != self.origin and truck.target_region != self.origin)]
-                        if available_trucks:
-                            ho.request_truck(self, available_trucks)
-
-                    OrderAgent.unsorted_Os.append(self)
-
-
-                elif trucks_with_same_destination:
-                    # prepare for OB Phase
-                    EBs_in_trucks = [order for truck in trucks_with_same_destination for order in truck.load if order.EB]
-
-                    for eb in EBs_in_trucks:
-                        if ho.fits(self, eb.truck):  # Check if truck has space for the EB
-                            EBs_in_trucks_with_space.append(eb)
-                    
-                    if EBs_in_trucks_with_space:                       # EB in at least 1 truck (any), not in all of trucks
-                        max_fit_EB = max(EBs_in_trucks_with_space, key=lambda EB: EB.fitness)
-                        Pr_max_fit = abc.calculate_probability(max_fit_EB, EBs_in_trucks_with_space)
-                        
-                        # OB Phase
-                        rnd_num = random.random()
-                        if Pr_max_fit > rnd_num:
-                            ho.assign_truck(self, max_fit_EB.truck)
-                            abc.calculate_fitness(max_fit_EB) 
-                         
-                        else:
-                            abc.SB_Phase(self, trucks_with_same_destination, OrderAgent.unsorted_Os)                            
-                            
-                    elif empty_trucks_with_same_origin:
-                        # SB Phase
-                        abc.SB_Phase(self, empty_trucks_with_same_origin, OrderAgent.unsorted_Os)
-                       
-                elif empty_trucks_with_same_origin:
-                        # SB Phase
-                        abc.SB_Phase(self, empty_trucks_with_same_origin, OrderAgent.unsorted_Os)
-
-            self.timer -= 1
-             
-
-
-class TruckAgent(mesa.Agent):
-    layer = 1
-    truck_shapes = ['img/F1_truck.png','img/F2_truck.png','img/F2_truck.png']
-    limit = 10               # ABC-related parameter - decreased in every instance step when self.collecting_orders
-
-    Ts_in_R1 = []
-    Ts_in_R2 = []
-    Ts_in_R3 = []
-    Ts_in_R4 = []
-    
-    
-    def __init__(self, model, parsed_truck) -> None:
-        super().__init__(model.next_id(), model)
-        # parsed vars:
-        self.truck_id = parsed_truck.id
-        self.capacity = parsed_truck.capacity
-        self.start_region = parsed_truck.start_region
-        self.freighter = parsed_truck.freighter
-
-        # simu-related vars
-        self.target_region = None
-        self.vector = None
-        self.shape = self.truck_shapes[self.freighter]
-        self.next_pos = None
-        self.pos = RegionAgent.get_position(self, self.start_region)
-        self.dispatched = False
-        self.requested = False
-        self.req_o = None
-        #movement vars
-        self.target_pos = None
-        self.heading = None
-        self.angle = 0.0
-
-        #analysis vars
-        self.total_volume = 0
-
-        # abc-related vars
-        self.objective = None
-        self.fitness = None
-        self.timer = self.limit
-        self.collect_orders = True                                              # initially at the starting region, trucks collect, then depart
-        self.load = []                                                          # list of all collected orders
-
-        getattr(TruckAgent, f'Ts_in_R{self.start_region}', []).append(self)     #adds truck to a list of all trucks in the same region 
-
-        model.space.place_agent(self, self.pos)
-        model.schedule.add(self)
-        
-        # simu-related funcs in helperTruck.py    
-
-    def step(self):
-
-        if self.dispatched:
-            
-            distance = np.round(np.linalg.norm(np.array(self.pos) - np.array(self.target_pos)), 2)
-            self.pos = self.pos + self.model.dt * self.model.agent_velocity * np.array([np.cos(self.angle), np.sin(self.angle)])
-
-            if distance < 1:
-                if self.requested:
-                    self.requested = False
-
-                else:
-                    ht.deliver_orders(self)
-                    self.total_volume = 0
-
-                ht.adjust_curr_region(self)                   
-                self.dispatched = False
-                self.collect_orders = True
-
-        elif self.load:
-            if ht.ready_to_dispatch(self):
-                order = random.choice(self.load)                     # any order bcs all have same dest
-                self.target_region = order.destination 
-                self.target_pos = RegionAgent.get_position(self, self.target_region)
-                ht.adjust_target_region(self, self.target_pos) 
-                self.collect_orders = False
-
-                self.total_volume = sum(o.volume for o in self.load)
-                self.dispatched = True
-                fl.dispatched_truck_status(self)
-        
-        elif self.requested:
-            self.target_pos = RegionAgent.get_position(self, self.target_region)
-            ht.adjust_target_region(self, self.target_pos)  
-            self.collect_orders = False
-            self.total_volume = 0
-
-            self.dispatched = True
-            fl.dispatched_truck_status(self)
\ No newline at end of file
+"""Module defining agents (init) and their behavior (step)."""
+
+import numpy as np
+from collections import Counter
+
+import source.helperOrder as ho
+import source.helperTruck as ht
+import source.abc as abc
+from source.core import Agent
+
+
+class BackgroundAgent(Agent):
+    def __init__(self, unique_id: int, model, pos) -> None:
+        super().__init__(unique_id, model)
+        self.pos = pos
+        self.layer = 0
+        self.size = model.space_size
+
+        model.space.place_agent(self, pos)
+        model.schedule.add(self)
+
+
+class RegionAgent(Agent):
+    def __init__(self, model, parsed_region) -> None:
+        super().__init__(model.next_id(), model)    
+        # parsed vars:
+        self.name = parsed_region.name
+        self.region_id = parsed_region.id
+        self.pos = RegionAgent.get_position(self, self.region_id)
+
+    def get_position(agent, region_id)  -> tuple:
+        """returns coordinates of the region id, mainly for visualization, looked up in the region table of the model (`model.region_table`)
+
+        Args:
+            agent (TruckAgent, RegionAgent): instance requiring region coordinates
+            region_id (int): id of the assigned region
+
+        Returns:
+            tuple: (x, y) coordinates
+        """        
+        return agent.model.region_table.position(region_id)
+        
+
+
+class FreighterAgent(Agent):
+    def __init__(self, model, parsed_freighter) -> None:
+        super().__init__(model.next_id(), model)
+        # parsed vars:
+        self.freighter_id = parsed_freighter.id
+        self.name = parsed_freighter.name
+        self.trucks = parsed_freighter.trucks
+
+        model.schedule.add(self)
+
+def role_flag(role) -> property:
+    """Returns a boolean property reading and writing one bit of the ABC role of an order (`OrderAgent.role`)."""
+    def get(order) -> bool:
+        return order.role & role != 0
+
+    def set(order, value) -> None:
+        order.role = order.role | role if value else order.role & ~role
+
+    return property(get, set)
+
+
+class OrderAgent(Agent):
+        # orders are the bulk of all agents: their attributes are slots (no per-order __dict__) and their ABC role flags
+        # (onlooker, scout, employed bee) are bits of one int; the advertisement of its truck is only set when an order becomes EB
+        __slots__ = ('order_id', 'origin', 'destination', 'volume', 'due_step', 'delivered', 'placed', 'truck', 'request', 'req_t',
+                     'role', 'advertisement')
+        OB = role_flag(1)
+        SB = role_flag(2)
+        EB = role_flag(4)
+
+        def __init__(self, model, parsed_order) -> None:
+            super().__init__(model.next_id(), model)
+            # parsed vars:
+            self.order_id = parsed_order.id
+            self.origin = parsed_order.origin
+            self.destination = parsed_order.destination
+            self.volume = parsed_order.volume
+            self.due_step = model.curr_step + model.order_time_limit         # steps until the order is due
+
+            # simu-related vars
+            self.delivered = False
+            self.placed = False
+            self.truck = None
+            self.request = False
+            self.req_t = None
+
+            # ABC related vars
+            self.role = 0                                           # OB = SB = EB = False
+            self.advertisement = None                               # abc.Advertisement of the truck, if EB
+
+            model.lane_index.add(self)
+            model.metrics.add_order()
+            model.schedule.add(self)
+            model.schedule.wake(self)
+
+            # simu-related funcs in helperOrder.py
+
+        @property
+        def timer(self) -> int:
+            """Steps until the order is due, decreasing with every step of the model (0: due, negative: overdue)."""
+            return self.due_step - self.model.curr_step
+
+        @property
+        def active(self) -> bool:
+            """An order is activated (`model.schedule`) until it's placed."""
+            return not self.placed
+
+        def step(self):
+            trucks_with_same_origin = trucks_with_same_destination = empty_trucks_with_same_origin = []
+            EBs_in_trucks = EBs_in_trucks_with_space = []
+            max_fit_EB = None
+            Pr_max_fit = rnd_num = 0
+            if not self.placed and self not in self.model.pending:
+                transitions = self.model.transitions
+                # prepare for the ABC loop:
+                trucks_with_same_origin = ho.trucks_with_same_origin(self)
+                if trucks_with_same_origin:                    
+                    trucks_with_same_destination = ho.trucks_with_same_destination(self)
+                    if not trucks_with_same_destination:
+                        empty_trucks_with_same_origin = ho.empty_trucks_with_same_origin(self)
+
+                # start the ABC loop
+                if not trucks_with_same_origin:
+                    if not self.request:          
+                        available_trucks = [truck for region, trucks in self.model.region_index.empty.items() if region != self.origin
+                                            for truck in trucks if truck.target_region != self.origin]
+                        if available_trucks:
+                            ho.request_truck(self, available_trucks)
+
+                elif trucks_with_same_destination:
+                    if self.model.batch_onlookers and self.model.onlooker_phase(self, trucks_with_same_destination):
+                        return                                          # placed or queued by the batched OB phase of its lane
+
+                    # prepare for OB Phase
+                    profiler = self.model.profiler
+                    if profiler is not None:
+                        start = profiler.clock()
+                    EBs_in_trucks = [order for truck in trucks_with_same_destination for order in truck.load if order.EB]
+
+                    for eb in EBs_in_trucks:
+                        if self.volume <= eb.advertisement.free_capacity:  # Check if truck has space for the EB
+                            EBs_in_trucks_with_space.append(eb)
+                    
+                    if EBs_in_trucks_with_space:                       # EB in at least 1 truck (any), not in all of trucks
+                        max_fit_EB = max(EBs_in_trucks_with_space, key=lambda EB: EB.advertisement.fitness)
+                        Pr_max_fit = abc.calculate_probability(max_fit_EB, EBs_in_trucks_with_space)
+                        
+                        # OB Phase
+                        rnd_num = self.model.random.random()
+                        if profiler is not None:
+                            profiler.add('onlooker_selection', start)
+                            profiler.counters['ob_accept' if Pr_max_fit > rnd_num else 'ob_reject'] += 1
+                        if Pr_max_fit > rnd_num:
+                            ho.assign_truck(self, max_fit_EB.truck)
+                         
+                        else:
+                            abc.SB_Phase(self, trucks_with_same_destination, self.model.pending)                            
+                            
+                    elif empty_trucks_with_same_origin:
+                        # SB Phase
+                        abc.SB_Phase(self, empty_trucks_with_same_origin, self.model.pending)
+                       
+                elif empty_trucks_with_same_origin:
+                        # SB Phase
+                        abc.SB_Phase(self, empty_trucks_with_same_origin, self.model.pending)
+
+                # nothing changed, the order waits in the pending queue until it's woken by a relevant change
+                if self.model.transitions == transitions:
+                    self.model.pending.add(self, waiting_for_truck=not trucks_with_same_origin)
+                    if self.model.profiler is not None:
+                        self.model.profiler.counters['unplaceable_retries'] += 1
+             
+
+
+class TruckAgent(Agent):
+    layer = 1
+    truck_shapes = ['img/F1_truck.png','img/F2_truck.png','img/F2_truck.png']
+    
+    def __init__(self, model, parsed_truck) -> None:
+        # row of the truck in the fleet state table (model.fleet), which holds pos, target_pos, angle, dispatched and capacity
+        self.fleet_index = model.fleet.add(model.region_table.position(parsed_truck.start_region), parsed_truck.capacity)
+        super().__init__(model.next_id(), model)
+        # parsed vars:
+        self.truck_id = parsed_truck.id
+        self.capacity = parsed_truck.capacity
+        self.start_region = parsed_truck.start_region
+        self.freighter = parsed_truck.freighter
+
+        # simu-related vars
+        self.target_region = None
+        self.vector = None
+        self.shape = self.truck_shapes[self.freighter % len(self.truck_shapes)]
+        self.next_pos = None
+        self.pos = RegionAgent.get_position(self, self.start_region)
+        self.dispatched = False
+        self.requested = False
+        self.req_o = None
+        #movement vars
+        self.target_pos = None
+        self.heading = None
+        self.angle = 0.0
+
+        #analysis vars
+        self.total_volume = 0
+
+        # abc-related vars
+        self.objective = None
+        self.fitness = None                                                     # cached until the load changes (abc.calculate_fitness)
+        self.timer = model.truck_limit                                          # ABC-related parameter (model.truck_limit)
+        self.collect_orders = True                                              # initially at the starting region, trucks collect, then depart
+        self.load = []                                                          # list of all collected orders
+        self.load_volume = 0                                                    # total volume of the load, maintained by assign_truck and empty_truck_load
+        self.lanes = Counter()                                                  # number of loaded orders per (origin, destination) lane
+
+        model.region_index.add(self)                                            # adds truck to the index of all trucks in the same region 
+        model.metrics.add_truck(self.capacity)
+
+        model.space.place_agent(self, self.pos)
+        model.schedule.add(self)
+        
+        # simu-related funcs in helperTruck.py    
+
+    def __getstate__(self):
+        # pos, target_pos, angle, dispatched and capacity are pickled with the fleet table (model.snapshot), not set through its properties
+        return (self.__dict__, {'unique_id': self.unique_id, 'model': self.model})
+
+    @property
+    def pos(self):
+        return self.model.fleet.pos[self.fleet_index]
+
+    @pos.setter
+    def pos(self, pos):
+        if pos is not None:                                                     # Agent initializes pos to None
+            self.model.fleet.pos[self.fleet_index] = pos
+
+    @property
+    def target_pos(self):
+        return self.model.fleet.target_pos[self.fleet_index]
+
+    @target_pos.setter
+    def target_pos(self, target_pos):
+        self.model.fleet.target_pos[self.fleet_index] = np.nan if target_pos is None else target_pos
+
+    @property
+    def angle(self) -> float:
+        return self.model.fleet.angle[self.fleet_index]
+
+    @angle.setter
+    def angle(self, angle):
+        self.model.fleet.set_angle(self.fleet_index, angle)
+
+    @property
+    def dispatched(self) -> bool:
+        return self.model.fleet.dispatched[self.fleet_index]
+
+    @dispatched.setter
+    def dispatched(self, dispatched):
+        self.model.fleet.dispatched[self.fleet_index] = dispatched
+
+    @property
+    def capacity(self) -> int:
+        return self.model.fleet.capacity[self.fleet_index]
+
+    @capacity.setter
+    def capacity(self, capacity):
+        self.model.fleet.capacity[self.fleet_index] = capacity
+
+    @property
+    def free_capacity(self) -> int:
+        return self.capacity - self.load_volume
+
+    @property
+    def active(self) -> bool:
+        """A truck is activated (`model.schedule`) while it's loaded or requested and not dispatched. A parked empty truck
+        is woken when it's loaded or requested, a dispatched truck when it arrives (tick mode)."""
+        return not self.dispatched and (bool(self.load) or self.requested)
+
+    def step(self):
+
+        if self.dispatched:
+            # trucks are moved by model.fleet.advance() (tick mode) or arrive by an event in model.events (event-driven mode)
+            if self.model.fleet.arrived[self.fleet_index] and not self.model.event_driven:
+                ht.arrive(self)
+
+        elif self.load:
+            profiler = self.model.profiler
+            if profiler is None:
+                ready = ht.ready_to_dispatch(self)
+            else:
+                start = profiler.clock()
+                ready = ht.ready_to_dispatch(self)
+                profiler.add('ready_to_dispatch', start)
+            if ready:
+                order = self.model.random.choice(self.load)                     # any order bcs all have same dest
+                self.target_region = order.destination 
+                self.target_pos = RegionAgent.get_position(self, self.target_region)
+                ht.adjust_target_region(self, self.target_pos) 
+                self.collect_orders = False
+
+                self.total_volume = self.load_volume
+                ht.dispatch(self)
+        
+        elif self.requested:
+            self.target_pos = RegionAgent.get_position(self, self.target_region)
+            ht.adjust_target_region(self, self.target_pos)  
+            self.collect_orders = False
+            self.total_volume = 0
+
+            ht.dispatch(self)
\ No newline at end of file
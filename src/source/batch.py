@@ -0,0 +1,182 @@
+"""Headless batch runner: runs many TransportationModel replicas over problem instances and seeds in a process pool.
+
+Usage (from the src folder):
+    python -m source.batch --instances 11 139 180 --seeds 0-99 --dt 6e-2 --agent-velocity 10 --workers 8 --output results.csv
+
+Every replica seeds its model with `numpy.random.SeedSequence(seed)`, or with the child `seed` of `SeedSequence(entropy).spawn`
+if an entropy is given, so the results of a replica don't depend on the worker process it runs in.
+
+With `--warmup N`, the first N steps of every instance are run once (with the seed of the first replica), and all replicas
+continue from a snapshot of that state (`TransportationModel.snapshot`), reseeded with their own seed.
+"""
+
+import argparse
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from source.model import TransportationModel
+
+
+def replica_seed(seed, entropy=None) -> np.random.SeedSequence:
+    """Returns the seed sequence of a replica: `SeedSequence(seed)`, or the child `seed` of `SeedSequence(entropy).spawn`,
+    i.e., `SeedSequence(entropy, spawn_key=(seed,))`, if an entropy is given."""
+    if entropy is None:
+        return np.random.SeedSequence(seed)
+    return np.random.SeedSequence(entropy, spawn_key=(seed,))
+
+
+def run_replica(instance_number, seed, model_params=None, entropy=None) -> dict:
+    """Runs a single simulation until all orders are delivered and returns its statistics.
+
+    The seed is also used as the `simu_run` of the model, so every replica writes its own generated files
+    (`generated_files/{instance}_{seed}_*.txt`), if enabled by `model_params['trace_level']`.
+
+    Args:
+        instance_number (int): number of the problem instance (11, 139 or 180)
+        seed (int): seed of the model's random generator (`replica_seed`), and the simulation run number
+        model_params (dict, optional): keyword arguments passed to `TransportationModel`, by default without generated files
+        entropy (int, optional): entropy of the seed sequence spawning the replica seeds
+
+    Returns:
+        dict: instance number, seed, number of steps until completion, and the load per drive statistics
+              recorded during the run (`source.recorder.TraceRecorder.statistics`)
+    """
+    model_params = {'trace_level': 'none', **(model_params or {})}
+    model = TransportationModel(instance_number=instance_number, simu_run=seed, plot=False, seed=replica_seed(seed, entropy), **model_params)
+    model.run_model()
+
+    return {"instance_number": instance_number, "seed": seed, "steps": model.curr_step, **model.results}
+
+
+def warm_up(instance_number, seed, steps, model_params=None, entropy=None) -> bytes:
+    """Runs the first steps of a replica and returns a snapshot of its state, to be continued by `run_continuation`.
+
+    Args:
+        instance_number (int): number of the problem instance (11, 139 or 180)
+        seed (int): seed of the replica (`replica_seed`), and the simulation run number
+        steps (int): number of steps to run
+        model_params (dict, optional): keyword arguments passed to `TransportationModel`, by default without generated files
+        entropy (int, optional): entropy of the seed sequence spawning the replica seeds
+
+    Returns:
+        bytes: snapshot of the model (`TransportationModel.snapshot`)
+    """
+    model_params = {'trace_level': 'none', **(model_params or {})}
+    model = TransportationModel(instance_number=instance_number, simu_run=seed, plot=False, seed=replica_seed(seed, entropy), **model_params)
+    while model.running and model.curr_step < steps:
+        model.step()
+    snapshot = model.snapshot()
+    model.trace.close()
+    return snapshot
+
+
+def run_continuation(snapshot, seed, entropy=None) -> dict:
+    """Continues a snapshot (`warm_up`) as the replica `seed` until all orders are delivered and returns its statistics.
+
+    Args:
+        snapshot (bytes): snapshot of a model (`TransportationModel.snapshot`)
+        seed (int): seed the random generator is reseeded with (`replica_seed`), and the simulation run number
+        entropy (int, optional): entropy of the seed sequence spawning the replica seeds
+
+    Returns:
+        dict: statistics of the replica, including the steps of the snapshot (see `run_replica`)
+    """
+    model = TransportationModel.restore(snapshot, simu_run=seed, seed=replica_seed(seed, entropy))
+    model.run_model()
+
+    return {"instance_number": model.instance_number, "seed": seed, "steps": model.curr_step, **model.results}
+
+
+def run_batch(instance_numbers, seeds, model_params=None, max_workers=None, entropy=None, warmup=None) -> list[dict]:
+    """Runs a replica for every (instance, seed) pair in a process pool.
+
+    Args:
+        instance_numbers (list[int]): problem instances to run
+        seeds (list[int]): seeds (simulation runs) to run for every instance
+        model_params (dict, optional): keyword arguments passed to every `TransportationModel`
+        max_workers (int, optional): number of worker processes, defaults to the number of CPUs
+        entropy (int, optional): entropy of the seed sequence spawning the replica seeds (`replica_seed`)
+        warmup (int, optional): number of steps of every instance run once, and continued by all replicas (`warm_up`)
+
+    Returns:
+        list[dict]: statistics of every replica (see `run_replica`), ordered by instance and seed
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        if warmup:
+            snapshots = {instance_number: warm_up(instance_number, seeds[0], warmup, model_params, entropy) for instance_number in instance_numbers}
+            futures = [pool.submit(run_continuation, snapshots[instance_number], seed, entropy)
+                       for instance_number in instance_numbers for seed in seeds]
+        else:
+            futures = [pool.submit(run_replica, instance_number, seed, model_params, entropy)
+                       for instance_number in instance_numbers for seed in seeds]
+        return [future.result() for future in futures]
+
+
+def parse_seeds(values) -> list[int]:
+    """Parses seed arguments, where every value is a single seed ("7") or an inclusive range ("0-99").
+
+    Args:
+        values (list[str]): seed arguments from the command line
+
+    Returns:
+        list[int]: all seeds in the given order
+    """
+    seeds = []
+    for value in values:
+        if '-' in value:
+            first, last = value.split('-')
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(value))
+    return seeds
+
+
+def write_results(results, output_file) -> None:
+    """Writes the statistics of all replicas to a CSV file, one row per replica.
+
+    Args:
+        results (list[dict]): statistics returned by `run_batch`
+        output_file (str): path to the CSV file
+
+    Returns:
+        None
+    """
+    with open(output_file, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Runs TransportationModel replicas without the browser visualization.")
+    parser.add_argument('-i', '--instances', type=int, nargs='+', default=[11], help="problem instance numbers (11, 139, 180)")
+    parser.add_argument('-s', '--seeds', nargs='+', default=['0'], help="seeds, e.g. 0 1 2 or 0-99")
+    parser.add_argument('--entropy', type=int, default=None, help="spawn the replica seeds from a seed sequence with this entropy")
+    parser.add_argument('--warmup', type=int, default=None, help="continue all replicas from a snapshot of the first WARMUP steps")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('-o', '--output', default='generated_files/batch_results.csv', help="CSV file with the statistics of all runs")
+    parser.add_argument('--space-size', type=float, default=50.)
+    parser.add_argument('--agent-velocity', type=float, default=10.)
+    parser.add_argument('--dt', type=float, default=6e-2)
+    parser.add_argument('--event-driven', action='store_true', help="trucks travel the lane distances of the instance map and idle steps are skipped")
+    parser.add_argument('--batch-onlookers', action='store_true', help="OB phase of all orders waiting on a lane at once (batched ABC mode)")
+    parser.add_argument('--trace-level', choices=['none', 'dispatches', 'all'], default='none', help="generated files of every run")
+    args = parser.parse_args(argv)
+
+    model_params = {
+        'space_size': args.space_size,
+        'agent_velocity': args.agent_velocity,
+        'dt': args.dt,
+        'event_driven': args.event_driven,
+        'batch_onlookers': args.batch_onlookers,
+        'trace_level': args.trace_level
+    }
+    results = run_batch(args.instances, parse_seeds(args.seeds), model_params, args.workers, args.entropy, args.warmup)
+    write_results(results, args.output)
+    print(f"{len(results)} runs written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Headless core classes with the interface of the MESA classes used by the simulation (Agent, Model, BaseScheduler, ContinuousSpace),
+and a scheduler that activates only agents with pending work (SparseScheduler).
+
+Importing `mesa` loads its visualization, data collection (pandas) and network (networkx) modules, which the simulation itself
+does not need. The simulation core builds on these classes instead, so that it imports fast, e.g., in batch worker processes;
+the MESA web visualization (`source.server`) drives the model through the same interface (`step`, `running`).
+"""
+
+import bisect
+import heapq
+import random
+
+import numpy as np
+
+
+class Agent():
+    """Base class for a model agent (cf. `mesa.Agent`). Subclasses may declare `__slots__` to store their agents without a `__dict__`."""
+    __slots__ = ('unique_id', 'model', 'pos')
+
+    def __init__(self, unique_id, model) -> None:
+        self.unique_id = unique_id
+        self.model = model
+        self.pos = None
+
+    def step(self) -> None:
+        """A single step of the agent."""
+
+    @property
+    def active(self) -> bool:
+        """Whether the agent has pending work, i.e., is activated again in the next step of a `SparseScheduler`."""
+        return False
+
+    @property
+    def random(self) -> random.Random:
+        return self.model.random
+
+
+def seeded_random(seed_sequence) -> random.Random:
+    """Returns a `random.Random` generator seeded with 256 bits of the state of a `numpy.random.SeedSequence`."""
+    return random.Random(int.from_bytes(seed_sequence.generate_state(8).tobytes(), 'little'))
+
+
+class Model():
+    """Base class for models (cf. `mesa.Model`), with its own random generator `self.random`.
+
+    The generator is seeded from a `numpy.random.SeedSequence` (`self.seed_sequence`) of the seed: an int seed, a SeedSequence,
+    e.g., a child of `SeedSequence(entropy).spawn(n)` for the replicas of a batch, or None for fresh entropy from the OS,
+    which is kept in `self.seed_sequence.entropy` to reproduce the run. The streams of different seeds (and of different
+    children of a SeedSequence) are independent, and a model shares its generator with no other model, so replicas give
+    the same results in any process or thread.
+    """
+
+    def __init__(self, seed=None) -> None:
+        self.running = True
+        self.current_id = 0
+        self._seed = seed
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.random = seeded_random(self.seed_sequence)
+        self.profiler = None                                    # source.profiler.PhaseProfiler, off by default
+
+    def run_model(self) -> None:
+        while self.running:
+            self.step()
+
+    def step(self) -> None:
+        """A single step of the model."""
+
+    def next_id(self) -> int:
+        self.current_id += 1
+        return self.current_id
+
+    def reset_randomizer(self, seed=None) -> None:
+        """Restarts the random generator from the seed, by default from the seed sequence of the model."""
+        if seed is not None:
+            self._seed = seed
+            self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.random = seeded_random(self.seed_sequence)
+
+
+class BaseScheduler():
+    """Activates all agents one at a time, in the order they were added (cf. `mesa.time.BaseScheduler`)."""
+
+    def __init__(self, model) -> None:
+        self.model = model
+        self.steps = 0
+        self.time = 0
+        self._agents = {}
+
+    def add(self, agent) -> None:
+        if agent.unique_id in self._agents:
+            raise ValueError(f"Agent with unique id {agent.unique_id!r} already added to scheduler")
+        self._agents[agent.unique_id] = agent
+
+    def remove(self, agent) -> None:
+        del self._agents[agent.unique_id]
+
+    def step(self) -> None:
+        for agent_key in list(self._agents):
+            agent = self._agents.get(agent_key)
+            if agent is not None:
+                agent.step()
+        self.steps += 1
+        self.time += 1
+
+    def get_agent_count(self) -> int:
+        return len(self._agents)
+
+    @property
+    def agents(self) -> list:
+        return list(self._agents.values())
+
+
+class SparseScheduler(BaseScheduler):
+    """Activates only the agents with pending work, one at a time in the order they were added (by unique id), cf. `BaseScheduler`.
+
+    An agent is activated once it's woken (`wake`) by a state change relevant to it, and again in every following step
+    as long as it's `active` after its step. As with `BaseScheduler`, an agent woken during a step is activated in the same
+    step if its turn is still to come (larger unique id than the agent being activated), otherwise in the next step.
+    The cost of a step thus follows the number of active agents rather than the number of all agents.
+    """
+
+    def __init__(self, model) -> None:
+        super().__init__(model)
+        self._next = set()                                      # unique ids to activate in the next step
+        self._queue = []                                        # sorted unique ids to activate in the current step
+        self._late = []                                         # heap of unique ids woken during the step, still to activate
+        self._current = None                                    # unique id of the agent being activated
+
+    def remove(self, agent) -> None:
+        super().remove(agent)
+        self._next.discard(agent.unique_id)
+
+    def wake(self, agent) -> None:
+        self.wake_all((agent,))
+
+    def wake_all(self, agents) -> None:
+        current = self._current
+        if current is None:
+            self._next.update(agent.unique_id for agent in agents)
+            return
+        for agent in agents:
+            if agent.unique_id > current:
+                heapq.heappush(self._late, agent.unique_id)
+            else:
+                self._next.add(agent.unique_id)
+
+    def step(self) -> None:
+        profiler = self.model.profiler
+        queue = self._queue = sorted(self._next)
+        self._next = set()
+        late = self._late = []
+        i, n = 0, len(queue)
+        previous = None
+        while True:                                             # merges the sorted queue with the ids woken during the step
+            if late and (i == n or late[0] < queue[i]):
+                unique_id = heapq.heappop(late)
+            elif i < n:
+                unique_id = queue[i]
+                i += 1
+            else:
+                break
+            if unique_id == previous:                           # woken more than once
+                continue
+            previous = self._current = unique_id
+            agent = self._agents.get(unique_id)
+            if agent is not None:
+                if profiler is None:
+                    agent.step()
+                else:
+                    profiler.step_agent(agent)
+                if agent.active:
+                    self._next.add(unique_id)
+        self._current = None
+        self.steps += 1
+        self.time += 1
+
+    def remaining(self) -> list:
+        """Returns the agents still to activate in the current step, from the agent being activated on, ordered by unique id."""
+        if self._current is None:
+            return []
+        unique_ids = set(self._queue[bisect.bisect_left(self._queue, self._current):]).union(self._late)
+        return [self._agents[unique_id] for unique_id in sorted(unique_ids) if unique_id in self._agents]
+
+    @property
+    def active_count(self) -> int:
+        """Number of agents to activate in the next step."""
+        return len(self._next)
+
+
+class ContinuousSpace():
+    """Continuous, non-toroidal space in which agents are placed at (x, y) coordinates (cf. `mesa.space.ContinuousSpace`)."""
+
+    def __init__(self, x_max, y_max, x_min=0, y_min=0) -> None:
+        self.x_min, self.x_max = x_min, x_max
+        self.y_min, self.y_max = y_min, y_max
+        self._agent_to_index = {}                               # all placed agents, read by the visualization
+
+    def place_agent(self, agent, pos) -> None:
+        self._agent_to_index[agent] = None
+        agent.pos = pos
+
+    def move_agent(self, agent, pos) -> None:
+        agent.pos = pos
+
+    def remove_agent(self, agent) -> None:
+        del self._agent_to_index[agent]
+        agent.pos = None
+
+    def get_heading(self, pos_1, pos_2):
+        """Returns the heading vector from pos_1 to pos_2."""
+        return np.array(pos_2) - np.array(pos_1)
@@ -1,87 +1,154 @@
-"""Module defining helper functions for generating files with agent status or information."""
-
-
-def add_header(file_path, header) -> None:
-    """Adds a header to a file if it's empty, or creates the file with the header if it doesn't exist.
-    Args:
-        file_path (str): The path to the file where the header will be added.
-        header (str): The header string to be written to the file.
-
-    Returns:
-        None
-    """  
-    try:
-        with open(file_path, 'r') as file:
-            if file.read().strip() == "":
-                with open(file_path, 'a') as file:
-                    file.write(header + '\n')
-    except FileNotFoundError:
-        with open(file_path, 'a') as file:
-            file.write(header + '\n')
-
-
-def write_delivered_O_to_file(order) -> None:
-    """Writes information about a delivered order to a text file.
-
-        The header includes columns for:
-            - Current simulation step ("curr_step")
-            - Order ID ("order_id")
-            - Origin region
-            - Destination region
-            - Truck ID that delivered the order ("truck_id")
-            - Order volume
-    Args:
-        order (OrderAgent): The delivered order object for which information will be written.
-        filename_format (str, optional): The format string used to construct the filename.
-                                            Defaults to "delivered_Os.txt".
-    Returns:
-        None
-    """
-
-    filename = f'generated_files/{order.model.instance_number}_{order.model.simu_run}_delivered_Os.txt'
-    add_header(filename, "curr_step order_id origin destination truck_id volume")  
-    with open(filename, 'a') as file:
-        file.write(
-            str(order.model.curr_step) + " " +
-            str(order.order_id) + " " +
-            str(order.origin) + " " +
-            str(order.destination) + " " +
-            str(order.truck.truck_id) + " " +
-            str(order.volume) + '\n'
-        )
-
-def dispatched_truck_status(truck) -> None:
-    """Writes dispatched truck status information to a text file.
-
-        Writes a formatted string to the file, including information about the truck:
-            - Current simulation step (using `truck.model.curr_step`)
-            - Truck ID (using `truck.truck_id`)
-            - Starting region (using `truck.start_region`)
-            - Target region (using `truck.target_region`)
-            - Order IDs in the truck's load:
-                - Uses list comprehension (`[o.order_id for o in truck.load]` if `truck.load` exists,
-                    otherwise writes an empty list "[]" as a string.
-            - Total volume of orders in the truck's load:
-                - Uses a conditional expression (`sum(o.volume for o in truck.load) if truck.load else 0`)
-                    to calculate the total volume, handling cases where `truck.load` might be empty.
-
-    **Note:** This function assumes the `TruckAgent` object represents a dispatched truck.
-    Args:
-        truck (TruckAgent): The dispatched truck object for which status information will be written.
-    Returns:
-        None
-    """
-    filename = f'generated_files/{truck.model.instance_number}_{truck.model.simu_run}_dispatched_truck_status.txt'
-    header = "curr_step truck_id t_start_region t_destination_region order_ids tot_volume "
-    add_header(filename, header)
-    
-    # Append the required information for each step
-    with open(filename, 'a') as file:
-        file.write(
-            str(truck.model.curr_step) + " " +
-            str(truck.truck_id) + " " +
-            str(truck.start_region) + " " +
-            str(truck.target_region) + " " +
-            str([o.order_id for o in truck.load] if truck.load else "[]") + " " +
-            str(sum(o.volume for o in truck.load) if truck.load else 0) + '\n'
-        )
+"""Module defining helper functions for generating files with agent status or information."""
+
+
+class TraceWriter():
+    """Writes the generated files (traces) of one simulation run: `generated_files/{instance}_{simu_run}_{trace}.txt`.
+
+    Every file is opened once per run and its header is written once. Rows are buffered in memory and written
+    in batches of `buffer_size` rows, and when the run ends (`close`).
+
+    Trace levels:
+        - 'all': delivered orders (`delivered_Os`) and dispatched trucks (`dispatched_truck_status`)
+        - 'dispatches': only dispatched trucks, which is the input of the load per drive analysis
+        - 'none': no files are written
+
+    A pickled trace writer (`TransportationModel.snapshot`) keeps the paths and the lengths of its files instead of the open files,
+    and is restored without files until it's reopened (`reopen`).
+    """
+    LEVELS = ('none', 'dispatches', 'all')
+    HEADERS = {
+        'delivered_Os': "curr_step order_id origin destination truck_id volume",
+        'dispatched_truck_status': "curr_step truck_id t_start_region t_destination_region order_ids tot_volume ",
+    }
+
+    def __init__(self, model, level='all', buffer_size=1000) -> None:
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown trace level {level!r}, choose one of {self.LEVELS}")
+        self.profiler = model.profiler                          # records the writes as the phase 'trace_io'
+        self.level = level
+        self.buffer_size = buffer_size
+        self.files = {}
+        self.buffers = {}
+
+        traces = {'none': [], 'dispatches': ['dispatched_truck_status'], 'all': ['delivered_Os', 'dispatched_truck_status']}[level]
+        for trace in traces:
+            file = open(self.path(model, trace), 'w')
+            file.write(self.HEADERS[trace] + '\n')
+            self.files[trace] = file
+            self.buffers[trace] = []
+
+    @staticmethod
+    def path(model, trace) -> str:
+        return f'generated_files/{model.instance_number}_{model.simu_run}_{trace}.txt'
+
+    def __getstate__(self) -> dict:
+        self.flush()
+        return {'level': self.level, 'buffer_size': self.buffer_size, 'written': {trace: (file.name, file.tell()) for trace, file in self.files.items()}}
+
+    def __setstate__(self, state) -> None:
+        self.level = state['level']
+        self.buffer_size = state['buffer_size']
+        self.written = state['written']                         # {trace: (path, length)} of the files when the writer was pickled
+        self.profiler = None
+        self.files = {}
+        self.buffers = {}
+
+    def reopen(self, model) -> None:
+        """Reopens the files of a restored writer for the run of the model: a file of the same run is truncated to its length when
+        the writer was pickled, and a new run (forked with another `simu_run`) starts with a copy of that part of the file."""
+        for trace, (path, length) in self.written.items():
+            new_path = self.path(model, trace)
+            if new_path == path:
+                file = open(path, 'r+')
+                file.truncate(length)
+                file.seek(length)
+            else:
+                with open(path, 'rb') as old_file, open(new_path, 'wb') as new_file:
+                    new_file.write(old_file.read(length))
+                file = open(new_path, 'a')
+            self.files[trace] = file
+            self.buffers[trace] = []
+        self.written = {}
+        self.profiler = model.profiler
+
+    def enabled(self, trace) -> bool:
+        return trace in self.files
+
+    def write(self, trace, row) -> None:
+        """Buffers a row (without line break) of the trace and writes the buffer to the file when it's full."""
+        buffer = self.buffers[trace]
+        buffer.append(row)
+        if len(buffer) >= self.buffer_size:
+            self._write_buffer(trace)
+
+    def _write_buffer(self, trace) -> None:
+        buffer = self.buffers[trace]
+        if buffer:
+            if self.profiler is None:
+                self.files[trace].write('\n'.join(buffer) + '\n')
+            else:
+                start = self.profiler.clock()
+                self.files[trace].write('\n'.join(buffer) + '\n')
+                self.profiler.add('trace_io', start)
+            buffer.clear()
+
+    def flush(self) -> None:
+        for trace, file in self.files.items():
+            self._write_buffer(trace)
+            file.flush()
+
+    def close(self) -> None:
+        """Writes all buffered rows and closes the files, at the end of the run."""
+        for trace, file in self.files.items():
+            self._write_buffer(trace)
+            if self.profiler is None:
+                file.close()
+            else:
+                start = self.profiler.clock()
+                file.close()
+                self.profiler.add('trace_io', start)
+        self.files = {}
+
+
+def write_delivered_O_to_file(order) -> None:
+    """Writes information about a delivered order to a text file (through the trace writer of the model, `model.trace`).
+
+        The header includes columns for:
+            - Current simulation step ("curr_step")
+            - Order ID ("order_id")
+            - Origin region
+            - Destination region
+            - Truck ID that delivered the order ("truck_id")
+            - Order volume
+    Args:
+        order (OrderAgent): The delivered order object for which information will be written.
+    Returns:
+        None
+    """
+    trace = order.model.trace
+    if trace.enabled('delivered_Os'):
+        trace.write('delivered_Os', f'{order.model.curr_step} {order.order_id} {order.origin} {order.destination} {order.truck.truck_id} {order.volume}')
+
+def dispatched_truck_status(truck) -> None:
+    """Writes dispatched truck status information to a text file (through the trace writer of the model, `model.trace`).
+
+        Writes a formatted string to the file, including information about the truck:
+            - Current simulation step (using `truck.model.curr_step`)
+            - Truck ID (using `truck.truck_id`)
+            - Starting region (using `truck.start_region`)
+            - Target region (using `truck.target_region`)
+            - Order IDs in the truck's load:
+                - Uses list comprehension (`[o.order_id for o in truck.load]`), which is written as "[]" for an empty load.
+            - Total volume of orders in the truck's load:
+                - Uses the running total of the truck (`truck.load_volume`), which is 0 for an empty load.
+
+    **Note:** This function assumes the `TruckAgent` object represents a dispatched truck.
+    Args:
+        truck (TruckAgent): The dispatched truck object for which status information will be written.
+    Returns:
+        None
+    """
+    trace = truck.model.trace
+    if trace.enabled('dispatched_truck_status'):
+        trace.write('dispatched_truck_status', f'{truck.model.curr_step} {truck.truck_id} {truck.start_region} {truck.target_region} '
+                                               f'{[o.order_id for o in truck.load]} {truck.load_volume}')
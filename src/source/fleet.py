@@ -0,0 +1,70 @@
+"""Module defining the fleet-level state table of all trucks, stored as contiguous NumPy arrays (one row per truck)."""
+
+import numpy as np
+
+
+class FleetState():
+    """Struct-of-arrays state of the fleet: positions, target positions, headings, dispatched flags and capacities.
+
+    `TruckAgent` objects are views onto this table (their `pos`, `target_pos`, `angle`, `dispatched` and `capacity`
+    read and write their row `truck.fleet_index`), so that all in-transit trucks are moved and tested for arrival
+    in one vectorized operation per step (`advance`).
+    """
+
+    def __init__(self, size=16) -> None:
+        self.n = 0
+        self.pos = np.zeros((size, 2))
+        self.target_pos = np.full((size, 2), np.nan)
+        self.angle = np.zeros(size)
+        self.direction = np.zeros((size, 2))                    # unit vector (cos(angle), sin(angle))
+        self.dispatched = np.zeros(size, dtype=bool)
+        self.arrived = np.zeros(size, dtype=bool)               # set by advance() for trucks reaching their target in this step
+        self.capacity = np.zeros(size, dtype=np.int64)
+
+    def add(self, pos, capacity) -> int:
+        """Adds a truck to the table, growing the arrays if necessary.
+        Args:
+            pos (tuple): (x, y) coordinates of the truck
+            capacity (int): capacity of the truck
+        Returns:
+            int: row of the truck in the table
+        """
+        if self.n == len(self.angle):
+            self._grow(2 * self.n)
+        i = self.n
+        self.n += 1
+        self.pos[i] = pos
+        self.capacity[i] = capacity
+        return i
+
+    def _grow(self, size) -> None:
+        for name in ('pos', 'target_pos', 'angle', 'direction', 'dispatched', 'arrived', 'capacity'):
+            old = getattr(self, name)
+            new = np.full((size,) + old.shape[1:], np.nan) if name == 'target_pos' else np.zeros((size,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def set_angle(self, i, angle) -> None:
+        self.angle[i] = angle
+        self.direction[i] = (np.cos(angle), np.sin(angle))
+
+    def advance(self, distance_per_step) -> np.ndarray:
+        """Moves all dispatched trucks by `distance_per_step` along their heading and marks the trucks that arrived.
+        As in the per-truck movement, arrival is tested on the (rounded) distance to the target before the move: distance < 1.
+        Args:
+            distance_per_step (float): travelled distance in one step, i.e., `model.dt * model.agent_velocity`
+        Returns:
+            np.ndarray: rows of the trucks that arrived
+        """
+        n = self.n
+        self.arrived[:n] = False
+        moving = np.flatnonzero(self.dispatched[:n])
+        if moving.size == 0:
+            return moving
+
+        delta = self.pos[moving] - self.target_pos[moving]
+        distance = np.round(np.hypot(delta[:, 0], delta[:, 1]), 2)
+        self.pos[moving] += distance_per_step * self.direction[moving]
+        arrived = moving[distance < 1]
+        self.arrived[arrived] = True
+        return arrived
@@ -0,0 +1,122 @@
+"""Generator of synthetic problem instances in the schema of the bundled instances (`data_sets/problem_instance_*.json`).
+
+An instance is deterministic for a seed:
+    - regions 1 .. n_regions are random points in a square, the `map` holds the rounded distances of all lanes (ordered region pairs)
+    - trucks are located in random regions and belong to freighters drawn from the freighter mix
+    - the orders of a lane are drawn with Zipf weights over the lanes (in random order), i.e., demand is uniform
+      over lanes for `lane_skew = 0` and concentrated on a few lanes for larger skews
+    - order volumes are drawn uniformly from 1 .. max_volume, or lognormally around `volume_mean` (clipped to 1 .. max_volume)
+
+Usage (from the src folder):
+    python -m source.generator --instance-id 1000 --regions 8 --trucks 1000 --orders 100000 --freighters 0.4 0.3 0.2 0.1 --seed 0
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+
+def generate_instance(instance_id, n_regions=4, n_trucks=20, n_orders=500, freighter_mix=4, capacity=32, lane_skew=0.,
+                      volume='uniform', max_volume=None, volume_mean=None, volume_sigma=0.5, map_size=20., seed=0) -> dict:
+    """Generates a synthetic problem instance.
+
+    Args:
+        instance_id (int): id of the instance (`instance_id` of the file)
+        n_regions (int): number of regions (at least 2)
+        n_trucks (int): fleet size
+        n_orders (int): number of orders
+        freighter_mix (int or list[float]): number of freighters with equal fleet shares, or the fleet share of every freighter
+        capacity (int): capacity of every truck
+        lane_skew (float): Zipf exponent of the demand over lanes (0: uniform)
+        volume (str): volume distribution, 'uniform' or 'lognormal'
+        max_volume (int, optional): largest order volume, defaults to (and must not exceed) the truck capacity
+        volume_mean (float, optional): mean of the lognormal volumes, defaults to max_volume / 2
+        volume_sigma (float): shape of the lognormal volumes
+        map_size (float): side length of the square of the region points, i.e., the scale of the lane distances
+        seed (int): seed of the generator
+
+    Returns:
+        dict: the instance, with keys instance_id, trucks, map, orders and solution
+    """
+    if n_regions < 2:
+        raise ValueError("An instance needs at least 2 regions")
+    max_volume = max_volume or capacity
+    if not 1 <= max_volume <= capacity:
+        raise ValueError(f"max_volume must be in 1 .. capacity ({capacity}), otherwise orders don't fit into any truck")
+
+    rng = np.random.default_rng(seed)
+    regions = np.arange(1, n_regions + 1)
+
+    # map: rounded distances between random region points (at least 1)
+    points = rng.uniform(0., map_size, size=(n_regions, 2))
+    distances = np.maximum(1, np.rint(np.linalg.norm(points[:, None] - points[None], axis=-1))).astype(int)
+    lanes = [(int(o), int(d)) for o in regions for d in regions if o != d]
+    lane_map = [{'origin': o, 'destination': d, 'distance': int(distances[o - 1, d - 1])} for o, d in lanes]
+
+    # trucks
+    shares = np.full(freighter_mix, 1. / freighter_mix) if np.isscalar(freighter_mix) else np.asarray(freighter_mix, dtype=float)
+    freighters = rng.choice(len(shares), size=n_trucks, p=shares / shares.sum())
+    positions = rng.choice(regions, size=n_trucks)
+    trucks = [{'truckId': i, 'position': int(positions[i]), 'capacity': capacity, 'freighter': int(freighters[i])}
+              for i in range(n_trucks)]
+
+    # orders
+    weights = 1. / np.arange(1, len(lanes) + 1) ** lane_skew
+    weights = rng.permutation(weights)
+    order_lanes = rng.choice(len(lanes), size=n_orders, p=weights / weights.sum())
+    if volume == 'uniform':
+        volumes = rng.integers(1, max_volume, size=n_orders, endpoint=True)
+    elif volume == 'lognormal':
+        mean = volume_mean or max_volume / 2
+        volumes = np.clip(np.rint(rng.lognormal(np.log(mean) - volume_sigma ** 2 / 2, volume_sigma, size=n_orders)), 1, max_volume).astype(int)
+    else:
+        raise ValueError(f"Unknown volume distribution {volume!r}, choose 'uniform' or 'lognormal'")
+    orders = [{'orderId': i, 'origin': lanes[lane][0], 'destination': lanes[lane][1], 'volume': int(volumes[i])}
+              for i, lane in enumerate(order_lanes)]
+
+    return {'instance_id': instance_id, 'trucks': trucks, 'map': lane_map, 'orders': orders, 'solution': None}
+
+
+def write_instance(instance, output_file) -> None:
+    """Writes an instance to a JSON file, which is read by `json_parser.parse_data_set`.
+
+    Args:
+        instance (dict): instance returned by `generate_instance`
+        output_file (str): path of the JSON file
+
+    Returns:
+        None
+    """
+    with open(output_file, 'w') as f:
+        json.dump(instance, f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generates a synthetic problem instance.")
+    parser.add_argument('--instance-id', type=int, required=True)
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--trucks', type=int, default=20)
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--freighters', type=float, nargs='+', default=[4],
+                        help='number of freighters, or the fleet share of every freighter (e.g. 0.5 0.3 0.2)')
+    parser.add_argument('--capacity', type=int, default=32)
+    parser.add_argument('--lane-skew', type=float, default=0.)
+    parser.add_argument('--volume', choices=['uniform', 'lognormal'], default='uniform')
+    parser.add_argument('--max-volume', type=int, default=None)
+    parser.add_argument('--volume-mean', type=float, default=None)
+    parser.add_argument('--map-size', type=float, default=20.)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='defaults to data_sets/problem_instance_{instance_id}.json')
+    args = parser.parse_args()
+
+    freighter_mix = int(args.freighters[0]) if len(args.freighters) == 1 else args.freighters
+    instance = generate_instance(args.instance_id, args.regions, args.trucks, args.orders, freighter_mix, args.capacity, args.lane_skew,
+                                 args.volume, args.max_volume, args.volume_mean, map_size=args.map_size, seed=args.seed)
+    output_file = args.output or f'data_sets/problem_instance_{args.instance_id}.json'
+    write_instance(instance, output_file)
+    print(f"Instance {args.instance_id} ({args.regions} regions, {args.trucks} trucks, {args.orders} orders) written to {output_file}")
+
+
+if __name__ == '__main__':
+    main()
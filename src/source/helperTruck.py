@@ -1,106 +1,184 @@
-"""Module defining helper functions for truck agents."""
-
-import numpy as np
-import source.file as fl
-
-def adjust_target_region(truck, target_pos) -> None:    
-    """sets new target coordinates (from target region) and corresponding heading and angle towards the region
-    Args:
-        truck (TruckAgent)
-        target_pos (tuple): (x,y) coordinates of the targeted region
-    Returns:
-        None
-    """         
-    truck.heading = truck.model.space.get_heading(truck.pos, truck.target_pos)
-    truck.angle = np.arctan2(truck.heading[1], truck.heading[0])
-
-
-def one_order_due(truck) -> bool:
-    """Checks if there is at least one order in the truck's load that is due (has a timer of 0).
-    Args:
-        truck (TruckAgent): The truck object whose load needs to be checked.
-    Returns:
-        bool: True if at least one order is due, False otherwise.
-    """    
-    if any(order.timer == 0 for order in truck.load):
-        return True
-    else:
-        return False
-    
-
-def ready_to_dispatch(truck) -> bool:
-    """Checks if a truck is ready to be dispatched, considering two factors:
-
-    1. **Unplaced Orders with Matching Origin-Destination:**
-        - Identifies unplaced orders (not yet assigned to a truck) that share the
-            same origin and destination as at least one order already loaded on the truck.
-    2. **Truck Capacity and Due Orders:**
-        - If there are any unplaced orders with matching origin-destination:
-            - Calculates the minimum volume required among them.
-            - Checks if there's enough free space on the truck (capacity - current load)
-                to accommodate the minimum volume.
-            - Additionally, checks if there's at least one due order (`one_order_due(truck)`)
-                already on the truck.
-    Returns:
-        bool: True if the truck is ready to dispatch (no matching unplaced orders
-                or enough space for them, and no due orders), False otherwise.
-    """
-
-    same_orig_dest_Os = []
-    for o in truck.model.orders:
-        if not o.placed and any(
-            l.origin == o.origin and l.destination == o.destination for l in truck.load
-            ):
-            same_orig_dest_Os.append(o)
-
-        if same_orig_dest_Os:
-            min_available_volume = min(o.volume for o in same_orig_dest_Os)
-            total_load = sum(o.volume for o in truck.load)
-            free_space = truck.capacity - total_load
-            if free_space < min_available_volume or one_order_due(truck):
-                return True
-        else:
-            return True
-    
-
-    
-def empty_truck_load(truck) -> None:
-    """Empties the load of the specified truck.
-    This function removes all orders currently assigned to the truck.
-    Args:
-        truck (TruckAgent): The truck whose load needs to be emptied.
-    Returns:
-        None
-    """ 
-    truck.load = []    
-
-def deliver_orders(truck) -> None:
-    """Marks all orders in the truck's load as delivered and writes them to a file.
-
-    This function iterates through each order in the truck's load, sets its `delivered` attribute to `True`,
-    and calls the `fl.write_delivered_O_to_file(o)` function to write information about the delivered order to a file. 
-    Finally, it calls `empty_truck_load(truck)` to remove all orders from the truck.
-    Args:
-        truck (TruckAgent): The truck that has reached its destination and whose orders need to be marked as delivered and written to a file.
-    Returns:
-        None
-    """
-    for o in truck.load:
-        o.delivered = True
-        fl.write_delivered_O_to_file(o)
-    empty_truck_load(truck)
-    
-
-def adjust_curr_region(truck) -> None:
-    """Updates the truck's current region based on its target region.
-    This function sets the truck's `start_region` attribute to its current `target_region`,
-    effectively marking the target region as the new current region. It then clears the `target_region`
-    attribute, indicating that the truck has reached its previous target.
-    Args:
-        truck (TruckAgent): The truck whose current and target regions need to be adjusted.
-    Returns:
-        None
-    """
-    
-    truck.start_region = truck.target_region
-    truck.target_region = None
+"""Module defining helper functions for truck agents."""
+
+import heapq
+import math
+import source.file as fl
+
+def adjust_target_region(truck, target_pos) -> None:    
+    """sets new target coordinates (from target region) and corresponding heading and angle towards the region,
+    looked up for the lane from the current region in the region table of the model (`model.region_table`)
+    Args:
+        truck (TruckAgent)
+        target_pos (tuple): (x,y) coordinates of the targeted region
+    Returns:
+        None
+    """         
+    region_table = truck.model.region_table
+    truck.heading = region_table.lane_heading(truck.start_region, truck.target_region)
+    truck.angle = region_table.lane_angle(truck.start_region, truck.target_region)
+
+
+def one_order_due(truck) -> bool:
+    """Checks if there is at least one order in the truck's load that is due (has a timer of 0).
+    Args:
+        truck (TruckAgent): The truck object whose load needs to be checked.
+    Returns:
+        bool: True if at least one order is due, False otherwise.
+    """    
+    if any(order.timer == 0 for order in truck.load):
+        return True
+    else:
+        return False
+    
+
+def ready_to_dispatch(truck) -> bool:
+    """Checks if a truck is ready to be dispatched, considering two factors:
+
+    1. **Unplaced Orders with Matching Origin-Destination:**
+        - Looks up the minimum volume of the unplaced orders (not yet assigned to a truck) on every
+            (origin, destination) lane of the orders already loaded on the truck (`truck.lanes`), in the lane index of the model (`model.lane_index`).
+    2. **Truck Capacity and Due Orders:**
+        - If there are any unplaced orders with matching origin-destination:
+            - Checks if there's not enough free space on the truck (`truck.free_capacity`)
+                to accommodate the minimum volume.
+            - Additionally, checks if there's at least one due order (`one_order_due(truck)`)
+                already on the truck.
+    Returns:
+        bool: True if the truck is ready to dispatch (no matching unplaced orders,
+                not enough space for any of them, or a due order), False otherwise.
+    """
+    min_available_volume = None
+    for origin, destination in truck.lanes:
+        volume = truck.model.lane_index.min_volume(origin, destination)
+        if volume is not None and (min_available_volume is None or volume < min_available_volume):
+            min_available_volume = volume
+
+    if min_available_volume is None:
+        return True
+
+    return truck.free_capacity < min_available_volume or one_order_due(truck)
+
+
+    
+def empty_truck_load(truck) -> None:
+    """Empties the load of the specified truck.
+    This function removes all orders currently assigned to the truck and resets its running load totals and its cached fitness.
+    Args:
+        truck (TruckAgent): The truck whose load needs to be emptied.
+    Returns:
+        None
+    """ 
+    truck.model.region_index.clear_load(truck)
+    truck.load = []    
+    truck.load_volume = 0
+    truck.lanes.clear()
+    truck.fitness = None
+
+def deliver_orders(truck) -> None:
+    """Marks all orders in the truck's load as delivered and writes them to a file.
+
+    This function iterates through each order in the truck's load, sets its `delivered` attribute to `True`,
+    records the delivery (`model.recorder`) and calls the `fl.write_delivered_O_to_file(o)` function to write information about the delivered order to a file. 
+    The delivered orders are counted in the metrics of the model (`model.metrics`). Finally, it calls `empty_truck_load(truck)` to remove all orders from the truck.
+    Args:
+        truck (TruckAgent): The truck that has reached its destination and whose orders need to be marked as delivered and written to a file.
+    Returns:
+        None
+    """
+    truck.model.metrics.record_delivery(truck)
+    for o in truck.load:
+        o.delivered = True
+        truck.model.recorder.record_delivery(o)
+        fl.write_delivered_O_to_file(o)
+    empty_truck_load(truck)
+    
+
+def adjust_curr_region(truck) -> None:
+    """Updates the truck's current region based on its target region.
+    This function sets the truck's `start_region` attribute to its current `target_region`,
+    effectively marking the target region as the new current region. It then clears the `target_region`
+    attribute, indicating that the truck has reached its previous target. The truck is added to the region index
+    (`model.region_index`) of its new region and the pending orders of this region are woken (`model.pending`).
+    Args:
+        truck (TruckAgent): The truck whose current and target regions need to be adjusted.
+    Returns:
+        None
+    """
+    
+    truck.start_region = truck.target_region
+    truck.target_region = None
+    truck.model.region_index.add(truck)
+    truck.model.pending.wake_region(truck.start_region)
+
+
+def dispatch(truck) -> None:
+    """Dispatches the truck towards its target region, records it (`model.recorder`, `model.metrics`) and writes its status to a file.
+    While in transit, the truck is not part of any region in the region index (`model.region_index`), and the pending orders
+    of the region it leaves are woken (`model.pending`).
+    A requested truck that has been loaded before leaving delivers its load, so its request is closed.
+    In the event-driven mode (`model.event_driven`), the arrival of the truck is scheduled as an event in `model.events`,
+    at the step given by the distance of the lane (`model.region_table`) travelled with `model.dt * model.agent_velocity` per step.
+    Args:
+        truck (TruckAgent): The truck with a set target region (and target position).
+    Returns:
+        None
+    """
+    model = truck.model
+    if truck.requested and truck.load:
+        close_request(truck)                                # loaded in the meantime, the truck delivers its load instead
+    truck.dispatched = True
+    model.region_index.remove(truck)
+    model.pending.wake_region(truck.start_region)
+    model.transitions += 1
+    model.recorder.record_dispatch(truck)
+    model.metrics.record_dispatch(truck)
+    fl.dispatched_truck_status(truck)
+
+    if model.event_driven:
+        distance = model.region_table.lane_distance(truck.start_region, truck.target_region)
+        travel_steps = max(1, math.ceil(distance / (model.dt * model.agent_velocity)))
+        heapq.heappush(model.events, (model.curr_step + travel_steps, truck.unique_id, truck))
+
+
+def arrive(truck) -> None:
+    """Handles the arrival of a dispatched truck at its target region.
+    A requested truck arrives empty at the region of the requesting order, otherwise the truck delivers its load.
+    The truck is placed at the position of the target region, becomes part of it and collects orders again, i.e., it's also
+    available to be requested by pending orders without any truck in their region (`model.pending`).
+    Args:
+        truck (TruckAgent): The dispatched truck that reached its target region.
+    Returns:
+        None
+    """
+    if truck.requested:
+        close_request(truck)
+
+    else:
+        deliver_orders(truck)
+        truck.total_volume = 0
+
+    truck.pos = truck.target_pos                            # next heading is the one of the lane from this region
+
+    adjust_curr_region(truck)
+    truck.dispatched = False
+    truck.model.metrics.record_arrival()
+    truck.collect_orders = True
+    truck.model.pending.wake_requests()
+    truck.model.transitions += 1
+
+
+def close_request(truck) -> None:
+    """Closes the request of a requested truck, either on its arrival at the region of the requesting order, or when the truck
+    has been loaded and leaves to deliver instead. If the requesting order (`truck.req_o`) is still not placed at its next step,
+    it may request a truck again.
+    Args:
+        truck (TruckAgent): The requested truck.
+    Returns:
+        None
+    """
+    truck.requested = False
+    if truck.req_o is not None:
+        truck.req_o.request = False
+        truck.model.pending.wake(truck.req_o)
+        truck.req_o.req_t = None
+        truck.req_o = None
@@ -0,0 +1,143 @@
+"""Module defining incrementally maintained indexes of the model state, so that agents look up matching trucks instead of scanning the fleet."""
+
+from collections import defaultdict
+
+
+def destinations(truck) -> set:
+    """Returns the destinations of the orders loaded to the truck."""
+    return {destination for _, destination in truck.lanes}
+
+
+class RegionIndex():
+    """Per-model index of the trucks located in every region.
+
+    A truck is indexed in its current region (`truck.start_region`) while it is not dispatched:
+        - `trucks[region]`: all trucks in the region
+        - `loaded[(region, destination)]`: trucks in the region carrying at least one order to `destination`
+        - `empty[region]`: trucks in the region with an empty load
+    The destinations of a truck's load are read from its lane composition (`truck.lanes`).
+
+    The index is updated by `helperOrder.assign_truck`, `helperTruck.dispatch`, `helperTruck.empty_truck_load`
+    and `helperTruck.adjust_curr_region`. Dicts (with None values) serve as insertion-ordered sets.
+    """
+
+    def __init__(self) -> None:
+        self.trucks = defaultdict(dict)
+        self.loaded = defaultdict(dict)
+        self.empty = defaultdict(dict)
+        self.region = {}                                        # region in which a truck is indexed
+
+    def add(self, truck) -> None:
+        """Indexes the truck in its current region (`truck.start_region`)."""
+        region = truck.start_region
+        self.region[truck] = region
+        self.trucks[region][truck] = None
+        if truck.lanes:
+            for destination in destinations(truck):
+                self.loaded[(region, destination)][truck] = None
+        else:
+            self.empty[region][truck] = None
+
+    def remove(self, truck) -> None:
+        """Removes the truck from the index of its region, e.g., when the truck is dispatched."""
+        region = self.region.pop(truck, None)
+        if region is None:
+            return
+        del self.trucks[region][truck]
+        self.empty[region].pop(truck, None)
+        for destination in destinations(truck):
+            del self.loaded[(region, destination)][truck]
+
+    def add_order(self, truck, order) -> None:
+        """Updates the index after the order was loaded to the truck."""
+        region = self.region.get(truck)
+        if region is not None:
+            self.empty[region].pop(truck, None)
+            self.loaded[(region, order.destination)][truck] = None
+
+    def clear_load(self, truck) -> None:
+        """Updates the index before the load of the truck is emptied."""
+        region = self.region.get(truck)
+        if region is not None:
+            for destination in destinations(truck):
+                del self.loaded[(region, destination)][truck]
+            self.empty[region][truck] = None
+
+    def trucks_in(self, region) -> list:
+        return list(self.trucks[region])
+
+    def loaded_trucks(self, region, destination) -> list:
+        return list(self.loaded[(region, destination)])
+
+    def empty_trucks(self, region) -> list:
+        return list(self.empty[region])
+
+
+class LaneIndex():
+    """Per-model index of the unplaced orders on every (origin, destination) lane.
+
+    For every lane, the number of unplaced orders of every volume is counted (`unplaced[lane][volume]`), so that
+    the index doesn't hold any per-order entries and the minimum volume of unplaced orders on a lane is the smallest
+    key of its counts (order volumes are bounded by the truck capacity). Orders are removed by `helperOrder.assign_truck`.
+    """
+
+    def __init__(self) -> None:
+        self.unplaced = defaultdict(dict)
+
+    def add(self, order) -> None:
+        """Counts an unplaced order on its lane."""
+        counts = self.unplaced[(order.origin, order.destination)]
+        counts[order.volume] = counts.get(order.volume, 0) + 1
+
+    def remove(self, order) -> None:
+        """Removes an order from the counts of its lane, when it's placed."""
+        counts = self.unplaced[(order.origin, order.destination)]
+        if counts[order.volume] == 1:
+            del counts[order.volume]
+        else:
+            counts[order.volume] -= 1
+
+    def min_volume(self, origin, destination):
+        """Returns the smallest volume of the unplaced orders on the lane, or None if all orders of the lane are placed."""
+        counts = self.unplaced.get((origin, destination))
+        return min(counts) if counts else None
+
+
+class PendingOrders():
+    """Per-model queue of the orders that could not be placed at their last step.
+
+    Every order is held at most once. A pending order is not polled again until it is woken by a change that is relevant to it:
+        - a truck arrives at, leaves, or is loaded in the origin region of the order (`wake_region`)
+        - a truck arrives at its target and becomes available for requests, if there was no truck
+          in the origin region of the order to begin with (`wake_requests`)
+        - the truck request of the order is closed (`wake`)
+    Dicts (with None values) serve as insertion-ordered sets.
+    """
+
+    def __init__(self) -> None:
+        self.regions = defaultdict(dict)                        # origin region -> pending orders
+        self.requests = {}                                      # pending orders without any truck in their origin region
+
+    def __contains__(self, order) -> bool:
+        return order in self.regions.get(order.origin, ())
+
+    def __len__(self) -> int:
+        return sum(len(orders) for orders in self.regions.values())
+
+    def add(self, order, waiting_for_truck=False) -> None:
+        self.regions[order.origin][order] = None
+        if waiting_for_truck:
+            self.requests[order] = None
+
+    def wake(self, order) -> None:
+        self.regions.get(order.origin, {}).pop(order, None)
+        self.requests.pop(order, None)
+
+    def wake_region(self, region) -> None:
+        for order in self.regions.pop(region, ()):
+            self.requests.pop(order, None)
+
+    def wake_requests(self) -> None:
+        for order in self.requests:
+            self.regions[order.origin].pop(order, None)
+        self.requests = {}
@@ -0,0 +1,103 @@
+"""Module defining the binary cache of parsed problem instances.
+
+Parsing a problem instance (`json.load` of the whole file, then one dict per truck, order and lane) is repeated on every model
+construction. The cache stores the parsed instance as NumPy arrays in an uncompressed `.npz` file, keyed by the SHA-256 hash
+of the content of the instance file, i.e., a cached instance is used as long as the file is unchanged (fresh), wherever
+the file is located. Cache files are written atomically, so batch worker processes can share the cache directory.
+
+Arrays of a parsed instance:
+    - trucks: `truck_id`, `truck_position`, `truck_capacity`, `truck_freighter`
+    - orders: `order_id`, `order_origin`, `order_destination`, `order_volume`
+    - regions: `region_ids` and the (n, n) `distance` matrix of all lanes (`source.regions.RegionTable.from_lanes`)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from source.regions import RegionTable
+
+CACHE_DIR = 'data_sets/.cache'
+CACHE_VERSION = 1                                       # part of the key, increased when the arrays change
+COLUMNS = {                                             # array: key of the field in the JSON entries
+    'trucks': {'truck_id': 'truckId', 'truck_position': 'position', 'truck_capacity': 'capacity', 'truck_freighter': 'freighter'},
+    'orders': {'order_id': 'orderId', 'order_origin': 'origin', 'order_destination': 'destination', 'order_volume': 'volume'},
+}
+ARRAYS = (*COLUMNS['trucks'], *COLUMNS['orders'], 'region_ids', 'distance')
+
+
+def content_hash(json_file) -> str:
+    """Returns the SHA-256 hash of the content of the instance file (and the cache version)."""
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    with open(json_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_instance(json_file) -> dict:
+    """Parses the instance file into arrays.
+
+    Args:
+        json_file (str): path of the JSON instance file
+
+    Returns:
+        dict: arrays of the parsed instance (see module docstring)
+    """
+    with open(json_file, 'r') as f:
+        data = json.load(f)
+
+    arrays = {}
+    for key, columns in COLUMNS.items():
+        for array, field in columns.items():
+            arrays[array] = np.array([entry[field] for entry in data[key]], dtype=np.int64)
+
+    lanes = {(lane['origin'], lane['destination']): lane['distance'] for lane in data['map']}
+    region_ids = set(arrays['truck_position'].tolist()) | set(arrays['order_origin'].tolist()) | set(arrays['order_destination'].tolist())
+    region_table = RegionTable.from_lanes(lanes, region_ids)
+    arrays['region_ids'] = np.array(region_table.ids, dtype=np.int64)
+    arrays['distance'] = region_table.distance
+    return arrays
+
+
+def load_instance(json_file, cache_dir=CACHE_DIR) -> dict:
+    """Returns the arrays of the parsed instance, from the cache if it holds the current content of the file, otherwise
+    the file is parsed (`read_instance`) and cached.
+
+    Args:
+        json_file (str): path of the JSON instance file
+        cache_dir (str, optional): directory of the cache files, None to parse without the cache
+
+    Returns:
+        dict: arrays of the parsed instance (see module docstring)
+    """
+    if cache_dir is None:
+        return read_instance(json_file)
+
+    cache_file = os.path.join(cache_dir, content_hash(json_file) + '.npz')
+    try:
+        with np.load(cache_file) as cached:
+            return {name: cached[name] for name in ARRAYS}
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):            # not cached yet, or unreadable
+        pass
+
+    arrays = read_instance(json_file)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    except OSError:                                                         # e.g. read-only file system, run without the cache
+        return arrays
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_file, cache_file)                                    # atomic, concurrent writers write the same content
+    except OSError:                                                         # run without the cache
+        pass
+    finally:
+        if os.path.exists(tmp_file):                                        # not replaced: write error, or any other exception
+            os.remove(tmp_file)
+    return arrays
@@ -0,0 +1,127 @@
+"""Module defining the live metrics of a model: counters of the order and truck states, and an optional ring buffer of samples."""
+
+import numpy as np
+
+
+class RingBuffer():
+    """Columnar ring buffer: one NumPy array per column, holding the last `size` rows appended."""
+
+    def __init__(self, columns, size=1000) -> None:
+        """
+        Args:
+            columns (dict): dtype of every column, {name: dtype}
+            size (int): number of rows kept
+        """
+        self.size = size
+        self.count = 0                                          # rows appended in total
+        self.data = {name: np.zeros(size, dtype=dtype) for name, dtype in columns.items()}
+
+    def __len__(self) -> int:
+        return min(self.count, self.size)
+
+    def append(self, row) -> None:
+        i = self.count % self.size
+        for name, value in row.items():
+            self.data[name][i] = value
+        self.count += 1
+
+    def columns(self) -> dict:
+        """Returns the kept rows of every column, oldest first."""
+        if self.count <= self.size:
+            return {name: column[:self.count].copy() for name, column in self.data.items()}
+        i = self.count % self.size
+        return {name: np.concatenate((column[i:], column[:i])) for name, column in self.data.items()}
+
+
+class ModelMetrics():
+    """Counters of the order and truck states of a model, updated at the state transitions (O(1) per transition):
+        - orders: unplaced (`pending_orders`), loaded on a parked truck (`placed_orders`), on a dispatched truck
+          (`in_transit_orders`) and `delivered_orders`
+        - trucks: parked and empty (`idle_trucks`, incl. requested trucks that did not leave yet), parked and loaded
+          (`loading_trucks`) and `dispatched_trucks`
+        - `requests`: truck requests issued by orders
+        - `utilization`: share of the capacity of the fleet carrying orders in transit
+    With a sampling `interval` (in steps), the counters are sampled into a ring buffer (`samples`) of the last
+    `buffer_size` samples, see `sample`.
+    """
+
+    SAMPLE_COLUMNS = {'step': np.int64, 'pending_orders': np.int64, 'placed_orders': np.int64, 'in_transit_orders': np.int64,
+                      'delivered_orders': np.int64, 'idle_trucks': np.int64, 'loading_trucks': np.int64,
+                      'dispatched_trucks': np.int64, 'requests': np.int64, 'utilization': np.float64}
+
+    def __init__(self, interval=None, buffer_size=1000) -> None:
+        """
+        Args:
+            interval (int, optional): steps between two samples, None to not sample
+            buffer_size (int): number of samples kept
+        """
+        self.pending_orders = 0
+        self.placed_orders = 0
+        self.in_transit_orders = 0
+        self.delivered_orders = 0
+        self.idle_trucks = 0
+        self.loading_trucks = 0
+        self.dispatched_trucks = 0
+        self.requests = 0
+        self.in_transit_volume = 0
+        self.fleet_capacity = 0
+
+        self.interval = interval
+        self.samples = RingBuffer(self.SAMPLE_COLUMNS, buffer_size) if interval else None
+        self._next_sample = 0
+
+    @property
+    def utilization(self) -> float:
+        return self.in_transit_volume / self.fleet_capacity if self.fleet_capacity else 0.
+
+    def add_order(self) -> None:
+        self.pending_orders += 1
+
+    def add_truck(self, capacity) -> None:
+        self.idle_trucks += 1
+        self.fleet_capacity += int(capacity)
+
+    def record_assignment(self, truck) -> None:
+        """Called after an order is loaded on the truck (`helperOrder.assign_truck`)."""
+        self.pending_orders -= 1
+        self.placed_orders += 1
+        if len(truck.load) == 1:                                # first order of the truck
+            self.idle_trucks -= 1
+            self.loading_trucks += 1
+
+    def record_request(self) -> None:
+        self.requests += 1
+
+    def record_dispatch(self, truck) -> None:
+        """Called when the truck leaves its region (`helperTruck.dispatch`), loaded or empty."""
+        n = len(truck.load)
+        if n:
+            self.loading_trucks -= 1
+            self.placed_orders -= n
+            self.in_transit_orders += n
+            self.in_transit_volume += truck.load_volume
+        else:
+            self.idle_trucks -= 1
+        self.dispatched_trucks += 1
+
+    def record_delivery(self, truck) -> None:
+        """Called when the truck delivers its load (`helperTruck.deliver_orders`), before the load is emptied."""
+        self.in_transit_orders -= len(truck.load)
+        self.delivered_orders += len(truck.load)
+        self.in_transit_volume -= truck.load_volume
+
+    def record_arrival(self) -> None:
+        self.dispatched_trucks -= 1
+        self.idle_trucks += 1
+
+    def snapshot(self) -> dict:
+        """Returns the current value of every counter."""
+        return {name: getattr(self, name) for name in self.SAMPLE_COLUMNS if name != 'step'}
+
+    def sample(self, step) -> None:
+        """Appends the counters to the samples if sampling is enabled and the sampling interval passed since the last sample
+        (steps skipped in the event-driven mode are not sampled)."""
+        if self.samples is None or step < self._next_sample:
+            return
+        self.samples.append({'step': step, **self.snapshot()})
+        self._next_sample = step + self.interval
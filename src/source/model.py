@@ -1,84 +1,238 @@
-"""
-Copyright (c) 2024 Gojković, M.
-This work is licensed under a Creative Commons Attribution 4.0 International License. 
-License text can be found at https://creativecommons.org/licenses/by/4.0/deed.en
-"""
-
-
-"""
-Transportation Model 
-
-Applies modeled Artificial Bee Colony (ABC) swarm algorithm for task scheduling in logistics, while preserving freighter's privacy. 
-The accompanying scientific paper: Gojković, M., and Schranz, M. (in press). Preserving Privacy in Logistics by using Swarm Intelligence from the Bottom-Up. 
-                                   In Proceedings of the 12th IEEE International Conference on Intelligent Systems. 
-
-"""
-
-
-import mesa
-import source.json_parser as jp
-import performance_analysis.load_per_drive as an
-
-from source.agents import BackgroundAgent
-
-
-class TransportationModel(mesa.Model):
-
-    description = (
-        "A model for simulating task scheduling in logistics, while preserving freighter's privacy. The model is based on the Artificial Bee Colony swarm algorithm."
-    )
-
-
-    instance_number = input("Choose problem instance number 11, 139 or 180: ")
-    
-    def __init__(self,
-        space_size = 50.,
-        agent_radius = 1.,
-        agent_velocity = 10,
-        dt = 1e-3,
-        curr_step = 0,
-        simu_run = 0
-    ) -> None:
-        super().__init__()
-        self.simu_run = simu_run
-        self.space_size = space_size
-        self.curr_step = curr_step
-        self.space = mesa.space.ContinuousSpace(space_size, space_size, torus = False)
-        self.schedule = mesa.time.BaseScheduler(self)
-
-        self.agent_radius = agent_radius
-        self.agent_velocity = agent_velocity
-        self.dt = dt 
-
-        self.trucks = []
-        self.regions = []
-        self.orders = []
-        self.freighters = []
-
-        json_file = f'./data_sets/problem_instance_{self.instance_number}.json'  
-        jp.parse_data_set(self,json_file)
-        
-        pos = (space_size / 2, space_size / 2)
-        background = BackgroundAgent(self.next_id(), self, pos)
-        self.space.place_agent(background, pos)
-
-
-    def step(self):
-
-        self.schedule.step()
-        self.curr_step += 1
-                
-        if all (o.delivered for o in self.orders):
-            an.process_dispatched_trucks(self.instance_number, self.simu_run)
-            print("Simulation done.")
-            self.running = False
-
-    def run_model(self):
-        
-        while self.running:            
-            self.step()
-
-            
-       
-
-    
+"""
+Copyright (c) 2024 Gojković, M.
+This work is licensed under a Creative Commons Attribution 4.0 International License. 
+License text can be found at https://creativecommons.org/licenses/by/4.0/deed.en
+"""
+
+
+"""
+Transportation Model 
+
+Applies modeled Artificial Bee Colony (ABC) swarm algorithm for task scheduling in logistics, while preserving freighter's privacy. 
+The accompanying scientific paper: Gojković, M., and Schranz, M. (in press). Preserving Privacy in Logistics by using Swarm Intelligence from the Bottom-Up. 
+                                   In Proceedings of the 12th IEEE International Conference on Intelligent Systems. 
+
+"""
+
+
+import heapq
+import pickle
+import source.abc as abc
+import source.json_parser as jp
+import source.file as fl
+import source.helperTruck as ht
+import performance_analysis.load_per_drive as an
+
+from source.agents import BackgroundAgent, OrderAgent
+from source.core import Model, SparseScheduler, ContinuousSpace
+from source.fleet import FleetState
+from source.index import RegionIndex, LaneIndex, PendingOrders
+from source.metrics import ModelMetrics
+from source.recorder import TraceRecorder
+
+
+class TransportationModel(Model):
+
+    description = (
+        "A model for simulating task scheduling in logistics, while preserving freighter's privacy. The model is based on the Artificial Bee Colony swarm algorithm."
+    )
+
+
+    def __init__(self,
+        instance_number = 11,
+        space_size = 50.,
+        agent_radius = 1.,
+        agent_velocity = 10,
+        dt = 1e-3,
+        curr_step = 0,
+        simu_run = 0,
+        plot = True,
+        event_driven = False,
+        seed = None,
+        trace_level = 'all',
+        trace_buffer_size = 1000,
+        data_set = None,
+        metrics_interval = None,
+        metrics_buffer_size = 1000,
+        batch_onlookers = False,
+        profiler = None,
+        order_time_limit = 10,
+        truck_limit = 10,
+        w_1 = 1,
+        w_2 = 0,
+        w_3 = 0
+    ) -> None:
+        super().__init__(seed)                                  # all random decisions of the model's agents use self.random (int, SeedSequence or None)
+        self.profiler = profiler                                # source.profiler.PhaseProfiler recording the phases of the run, or None
+        self.instance_number = instance_number
+        self.simu_run = simu_run
+        self.plot = plot
+        self.results = None
+        self.space_size = space_size
+        self.curr_step = curr_step
+        self.space = ContinuousSpace(space_size, space_size)
+        self.schedule = SparseScheduler(self)                   # activates only orders and trucks with pending work
+
+        self.agent_radius = agent_radius
+        self.agent_velocity = agent_velocity
+        self.dt = dt 
+
+        # event-driven mode: trucks travel the lane distances of the instance map, the clock jumps to the next event
+        self.event_driven = event_driven
+        self.events = []                                        # heap of (arrival step, truck unique_id, truck)
+        self.transitions = 0                                    # number of state changes (assignments, requests, dispatches, arrivals)
+        self.batch_onlookers = batch_onlookers                  # batched ABC mode: OB phase of all orders of a lane at once
+        self.onlooker_lanes = (None, {})                        # (step, {lane: orders}) of the lanes still to batch in the current step
+
+        # ABC parameters
+        self.order_time_limit = order_time_limit                # steps until an order is due (OrderAgent.timer)
+        self.truck_limit = truck_limit                          # initial timer of the trucks (TruckAgent.timer)
+        self.objective_weights = (w_1, w_2, w_3)                # weights of the load, position and availability objectives (abc.calculate_objective)
+
+        self.region_table = None                                # regions, positions and lane tables of the instance (source.regions)
+        self.fleet = FleetState()
+        self.region_index = RegionIndex()
+        self.lane_index = LaneIndex()
+        self.pending = PendingOrders()
+        self.trucks = []
+        self.regions = []
+        self.orders = []
+        self.freighters = []
+        self.metrics = ModelMetrics(metrics_interval, metrics_buffer_size)    # live counters, sampled every metrics_interval steps
+
+        json_file = data_set or f'./data_sets/problem_instance_{self.instance_number}.json'   # data_set: path of any other problem instance file
+        jp.parse_data_set(self,json_file)
+        self.trace = fl.TraceWriter(self, trace_level, trace_buffer_size)
+        self.recorder = TraceRecorder()
+        
+        pos = (space_size / 2, space_size / 2)
+        background = BackgroundAgent(self.next_id(), self, pos)
+        self.space.place_agent(background, pos)
+
+
+    def step(self):
+        transitions = self.transitions
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.step_started(self.curr_step)
+            start = profiler.clock()
+        if self.event_driven:
+            self.process_arrivals()
+        else:
+            arrived = self.fleet.advance(self.dt * self.agent_velocity)
+            self.schedule.wake_all(self.trucks[i] for i in arrived)     # trucks are added to the fleet in the order of model.trucks
+        if profiler is not None:
+            profiler.add('truck_movement', start)
+
+        self.schedule.step()
+        self.curr_step += 1
+        self.metrics.sample(self.curr_step)
+                
+        if self.metrics.delivered_orders == len(self.orders):
+            self.trace.close()
+            self.results = self.recorder.statistics()
+            if profiler is not None:
+                profiler.stop()
+            if self.trace.level != 'none':
+                an.write_statistics(self.instance_number, self.simu_run, self.results, self.plot)
+            print("Simulation done.")
+            self.running = False
+
+        elif self.event_driven and self.transitions == transitions:
+            self.skip_to_next_event()
+
+    def onlooker_phase(self, order, trucks) -> bool:
+        """Batched ABC mode: when the first order of a lane enters the OB phase in a step, runs the OB phase of all orders of the lane
+        still to activate in this step at once (`abc.OB_Phase_lane`). Orders placed or queued as pending by the batched phase
+        skip their step, orders of the lane woken later in the step run their own OB phase. The orders still to activate are
+        grouped by lane once per step, at the first OB phase of the step. This changes the activation order of the orders,
+        see `abc.OB_Phase_lane`.
+
+        Args:
+            order (OrderAgent): order entering the OB phase, neither placed nor pending
+            trucks (list[TruckAgent]): trucks in the origin region carrying orders to the destination of the order
+
+        Returns:
+            bool: True if the order was placed or queued as pending by the batched OB phase
+        """
+        step, lanes = self.onlooker_lanes
+        if step != self.curr_step:
+            lanes = {}
+            for agent in self.schedule.remaining():
+                if isinstance(agent, OrderAgent) and not agent.placed:
+                    lanes.setdefault((agent.origin, agent.destination), []).append(agent)
+            self.onlooker_lanes = (self.curr_step, lanes)
+        lane = (order.origin, order.destination)
+        orders = lanes.get(lane)
+        if orders is None or order not in orders:               # lane already batched in this step, or order woken later
+            return False
+        del lanes[lane]
+        orders = [o for o in orders if o.unique_id >= order.unique_id and not o.placed and o not in self.pending]
+        if len(orders) < 2:
+            return False
+        if self.profiler is None:
+            abc.OB_Phase_lane(orders, trucks, self.pending)
+        else:
+            start = self.profiler.clock()
+            abc.OB_Phase_lane(orders, trucks, self.pending)
+            self.profiler.add('onlooker_lane', start)
+        return True
+
+    def process_arrivals(self):
+        """Event-driven mode: lets all trucks with an arrival event due at the current step arrive at their target region."""
+        while self.events and self.events[0][0] <= self.curr_step:
+            _, _, truck = heapq.heappop(self.events)
+            ht.arrive(truck)
+
+    def skip_to_next_event(self):
+        """Event-driven mode: called after a step without any state change, i.e., all following steps are idle until 
+        the next truck arrival or until an order loaded to a waiting truck becomes due (its timer reaches 0).
+        The clock jumps to that step, which also decreases the timers of all orders (`OrderAgent.timer`) by the skipped steps.
+        """
+        next_steps = [o.due_step for t in self.trucks if t.load and not t.dispatched for o in t.load if o.due_step >= self.curr_step]
+        if self.events:
+            next_steps.append(self.events[0][0])
+
+        if next_steps:
+            skipped = min(next_steps) - self.curr_step
+            if skipped > 0:
+                self.curr_step += skipped
+
+    def snapshot(self) -> bytes:
+        """Returns the full state of the model (fleet, orders and their ABC roles, cached fitness, indexes, pending queue,
+        events, metrics, random generator and step counter) as a pickle, to be resumed or forked with `restore`.
+        The generated files are not part of the snapshot: their rows buffered so far are written, and their lengths are kept.
+        """
+        return pickle.dumps(self, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def restore(cls, snapshot, simu_run=None, seed=None) -> 'TransportationModel':
+        """Restores a model from a `snapshot`, e.g., in another process, to continue the run from the step of the snapshot.
+
+        Args:
+            snapshot (bytes): state returned by `snapshot`
+            simu_run (int, optional): run number of a forked continuation, which writes its own generated files starting with
+                                      the rows of the snapshot; by default, the run continues in its own generated files
+            seed (int, SeedSequence, optional): reseeds the random generator of a forked continuation (`reset_randomizer`);
+                                                by default, it continues with the state of the snapshot
+
+        Returns:
+            TransportationModel: the restored model
+        """
+        model = pickle.loads(snapshot)
+        if simu_run is not None:
+            model.simu_run = simu_run
+        if seed is not None:
+            model.reset_randomizer(seed)
+        model.trace.reopen(model)
+        return model
+
+    def run_model(self):
+        
+        while self.running:            
+            self.step()
+
+            
+       
+
+    
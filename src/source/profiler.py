@@ -0,0 +1,108 @@
+"""Module defining the per-phase profiler of a model: wall time and calls of the phases of the ABC pipeline, and algorithm counters."""
+
+import cProfile
+import io
+import pstats
+import time
+from collections import Counter
+
+
+class PhaseProfiler():
+    """Profiler of one model (`TransportationModel(profiler=PhaseProfiler())`, `model.profiler`), off by default (None).
+    The phases and counters are recorded where they happen, behind a check of `model.profiler`, so a model without
+    a profiler only pays that check.
+
+    Phases (cumulative wall time and calls, a phase includes the phases it calls):
+        - `OrderAgent.step`, `TruckAgent.step`: steps of the agents activated by the scheduler
+        - `onlooker_selection`: OB phase of an order, choosing the EB with the highest fitness (`OrderAgent.step`)
+        - `onlooker_lane`: batched OB phase of the orders of a lane (`abc.OB_Phase_lane`)
+        - `scout_phase`: SB phase of an order (`abc.SB_Phase`)
+        - `ready_to_dispatch`: dispatch check of a loaded truck (`helperTruck.ready_to_dispatch`)
+        - `truck_movement`: moving the fleet (`FleetState.advance`) or the arrivals of the step (event-driven mode)
+        - `trace_io`: writing the generated files (`file.TraceWriter`)
+    Counters:
+        - `ob_accept`, `ob_reject`: OB decisions for, and against, the EB with the highest fitness
+        - `sb_fallback`: SB phases without a truck with space, falling back to an empty truck of the origin region
+        - `unplaceable_retries`: order activations ending without a truck, queued as pending again
+
+    With `profile_steps=(first, last)`, a sampler is enabled from step `first` until step `last` (excluded): a `cProfile.Profile`
+    by default, or any object with `enable()` and `disable()`, e.g., an adapter signalling an external sampling profiler.
+    """
+    COUNTERS = ('ob_accept', 'ob_reject', 'sb_fallback', 'unplaceable_retries')
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, profile_steps=None, sampler=None) -> None:
+        """
+        Args:
+            profile_steps (tuple, optional): (first, last) steps of the sampler
+            sampler (optional): object with `enable()` and `disable()`, a `cProfile.Profile` by default
+        """
+        self.phases = {}                                        # {phase: [calls, seconds]}
+        self.counters = Counter({name: 0 for name in self.COUNTERS})
+        self.profile_steps = profile_steps
+        self.sampler = (sampler or cProfile.Profile()) if profile_steps else None
+        self.sampling = False
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()                            # the sampler is not part of a model snapshot
+        state['sampler'] = None
+        state['sampling'] = False
+        return state
+
+    def add(self, phase, start) -> None:
+        """Adds a call of the phase, started at `start` (`clock()`)."""
+        elapsed = self.clock() - start
+        record = self.phases.get(phase)
+        if record is None:
+            self.phases[phase] = [1, elapsed]
+        else:
+            record[0] += 1
+            record[1] += elapsed
+
+    def step_agent(self, agent) -> None:
+        """Steps an agent activated by the scheduler, recorded as the phase `{agent class}.step`."""
+        start = self.clock()
+        agent.step()
+        self.add(f'{type(agent).__name__}.step', start)
+
+    def step_started(self, step) -> None:
+        """Enables the sampler when the model enters the range of `profile_steps`, and disables it when it leaves it."""
+        if self.sampler is None:
+            return
+        first, last = self.profile_steps
+        if not self.sampling and first <= step < last:
+            self.sampler.enable()
+            self.sampling = True
+        elif self.sampling and step >= last:
+            self.stop()
+
+    def stop(self) -> None:
+        """Disables the sampler, e.g., when the run ends within the range of `profile_steps`."""
+        if self.sampling:
+            self.sampler.disable()
+            self.sampling = False
+
+    def report(self, model=None) -> dict:
+        """Returns the phases (calls, seconds) and the counters, with the truck requests of the model (`model.metrics.requests`)."""
+        report = {
+            "phases": {phase: {"calls": calls, "time_s": seconds} for phase, (calls, seconds) in sorted(self.phases.items())},
+            "counters": dict(self.counters),
+        }
+        if model is not None:
+            report["counters"]["truck_requests"] = model.metrics.requests
+            report["steps"] = model.curr_step
+        return report
+
+    def format_report(self, model=None, top=15) -> str:
+        """Returns the report as text, followed by the `top` functions by cumulative time of a cProfile sampler."""
+        report = self.report(model)
+        lines = [f'{phase:<20} {phase_report["calls"]:>9} calls {phase_report["time_s"]:>9.4f} s'
+                 for phase, phase_report in report["phases"].items()]
+        lines += [f'{name:<20} {value:>9}' for name, value in report["counters"].items()]
+        if isinstance(self.sampler, cProfile.Profile) and not self.sampling:
+            stream = io.StringIO()
+            first, last = self.profile_steps
+            stream.write(f'cProfile of steps {first} to {last}:\n')
+            pstats.Stats(self.sampler, stream=stream).sort_stats('cumulative').print_stats(top)
+            lines.append(stream.getvalue())
+        return '\n'.join(lines)
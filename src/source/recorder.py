@@ -0,0 +1,87 @@
+"""Module defining the in-memory recorder of dispatch and delivery events, with online load per drive statistics."""
+
+from array import array
+
+
+class TraceRecorder():
+    """Records the dispatched trucks and delivered orders of a run in compact typed arrays (one array per column).
+
+    The load per drive statistics of `performance_analysis.load_per_drive.process_dispatched_trucks` are maintained
+    incrementally, with the same rules: dispatches from a region to itself are ignored, and consecutive dispatches
+    of the same truck at the same step form one drive. The empty capacity of a drive is taken from the capacity of its truck.
+    """
+
+    def __init__(self) -> None:
+        # dispatch events
+        self.dispatch_step = array('q')
+        self.dispatch_truck = array('q')
+        self.dispatch_start = array('q')
+        self.dispatch_target = array('q')
+        self.dispatch_volume = array('q')
+        # delivery events
+        self.delivery_step = array('q')
+        self.delivery_order = array('q')
+        self.delivery_truck = array('q')
+        self.delivery_volume = array('q')
+
+        # online load per drive statistics
+        self.loads = array('q')                                 # load of every completed drive
+        self.num_truck_drives = 0
+        self.total_empty_runs = 0
+        self.max_total_load = 0
+        self.total_load = 0
+        self._drive = None                                      # [step, truck_id, volume, capacity] of the current drive
+
+    def record_dispatch(self, truck) -> None:
+        step = truck.model.curr_step
+        self.dispatch_step.append(step)
+        self.dispatch_truck.append(truck.truck_id)
+        self.dispatch_start.append(truck.start_region)
+        self.dispatch_target.append(truck.target_region)
+        self.dispatch_volume.append(truck.load_volume)
+
+        if truck.start_region == truck.target_region:
+            return
+        drive = self._drive
+        if drive is not None and drive[0] == step and drive[1] == truck.truck_id:
+            drive[2] += truck.load_volume
+        else:
+            self._complete_drive()
+            self._drive = [step, truck.truck_id, truck.load_volume, int(truck.capacity)]
+
+    def record_delivery(self, order) -> None:
+        self.delivery_step.append(order.model.curr_step)
+        self.delivery_order.append(order.order_id)
+        self.delivery_truck.append(order.truck.truck_id)
+        self.delivery_volume.append(order.volume)
+
+    def _complete_drive(self) -> None:
+        if self._drive is None:
+            return
+        _, _, load, capacity = self._drive
+        self.loads.append(load)
+        self.num_truck_drives += 1
+        self.total_empty_runs += capacity - load
+        self.max_total_load = max(self.max_total_load, load)
+        self.total_load += load
+        self._drive = None
+
+    def statistics(self) -> dict:
+        """Returns the load per drive statistics of the run so far, as returned by `process_dispatched_trucks`."""
+        loads = self.loads.tolist()
+        n, total_empty_runs, max_total_load, total_load = self.num_truck_drives, self.total_empty_runs, self.max_total_load, self.total_load
+        if self._drive is not None:                             # the current drive is complete unless the truck is dispatched again at this step
+            _, _, load, capacity = self._drive
+            loads.append(load)
+            n += 1
+            total_empty_runs += capacity - load
+            max_total_load = max(max_total_load, load)
+            total_load += load
+
+        return {
+            "num_truck_drives": n,
+            "avg_empty_runs": total_empty_runs / n if n else 0,
+            "max_total_load": max_total_load,
+            "load_per_drive": loads,
+            "average_load_percentage": total_load / max_total_load * 100 / n if max_total_load else 0.,
+        }
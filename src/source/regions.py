@@ -0,0 +1,138 @@
+"""Module defining the region table of a problem instance: region ids, names, positions and dense lane lookup tables."""
+
+import numpy as np
+
+# regions of the bundled instances, with their coordinates on the map of the visualization
+BUNDLED_REGIONS = {1: ('klagenfurt', (17.0, 5.0)), 2: ('graz', (29.0, 13.0)), 3: ('wien', (39.0, 34.0)), 4: ('salzburg', (3.0, 26.0))}
+# lane distances of the map of the bundled instances (the same in both directions)
+BUNDLED_LANES = {(1, 2): 6, (1, 3): 14, (1, 4): 11, (2, 3): 10, (2, 4): 12, (3, 4): 13}
+
+
+def is_bundled_map(ids, distance) -> bool:
+    """Checks whether the regions and lane distances are those of the map of the bundled instances (or a part of it).
+
+    Args:
+        ids (list[int]): sorted region ids
+        distance (np.ndarray): (n, n) distances of all lanes, in the order of `ids`
+
+    Returns:
+        bool: True if all regions are bundled regions and all lanes have the bundled distances
+    """
+    if not set(ids) <= set(BUNDLED_REGIONS):
+        return False
+    return all(distance[i, j] == BUNDLED_LANES[min(origin, destination), max(origin, destination)]
+               for i, origin in enumerate(ids) for j, destination in enumerate(ids) if i != j)
+
+
+def shortest_distances(distance) -> np.ndarray:
+    """Completes a distance matrix with missing lanes (inf) by the shortest paths over the other lanes (Floyd-Warshall).
+
+    Args:
+        distance (np.ndarray): (n, n) distances, inf for lanes missing from the map
+
+    Returns:
+        np.ndarray: (n, n) shortest distances
+    """
+    distance = distance.copy()
+    for k in range(len(distance)):
+        np.minimum(distance, distance[:, k, None] + distance[None, k, :], out=distance)
+    return distance
+
+
+def embed(distance, space_size, margin=0.1) -> np.ndarray:
+    """Places the regions in the space such that their euclidean distances approximate the lane distances (classical MDS).
+
+    Args:
+        distance (np.ndarray): (n, n) symmetric distances
+        space_size (float): size of the (square) space
+        margin (float): share of the space size left free at the borders
+
+    Returns:
+        np.ndarray: (n, 2) positions
+    """
+    n = len(distance)
+    centering = np.eye(n) - 1. / n
+    gram = -0.5 * centering @ distance ** 2 @ centering
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    top = np.argsort(eigenvalues)[::-1][:2]
+    coordinates = np.zeros((n, 2))
+    coordinates[:, :len(top)] = eigenvectors[:, top] * np.sqrt(np.clip(eigenvalues[top], 0., None))
+
+    coordinates -= coordinates.min(axis=0)
+    extent = coordinates.max()
+    scale = space_size * (1 - 2 * margin) / extent if extent > 0 else 0.
+    return space_size * margin + coordinates * scale
+
+
+class RegionTable():
+    """Regions of a problem instance, derived from its `map` (and the regions of its trucks and orders), with dense lookup tables
+    built once when the instance is parsed:
+        - `positions[i]`: (x, y) coordinates of the region, the bundled coordinates if the map is the map of the bundled instances
+          (`is_bundled_map`), otherwise an embedding of the lane distances in the space (`embed`)
+        - `distance[i, j]`: distance of the lane from region i to region j (a missing lane by its reverse lane, or by the shortest
+          path over other lanes)
+        - `heading[i, j]`, `angle[i, j]`: heading vector and angle of a truck driving from region i to region j
+    Rows and columns are indexed by `index[region_id]`. The table is built from the lanes of the map by `from_lanes`.
+    """
+
+    def __init__(self, ids, distance, space_size=50.) -> None:
+        """
+        Args:
+            ids (list[int]): sorted region ids
+            distance (np.ndarray): (n, n) distances of all lanes, in the order of `ids` (see `from_lanes`)
+            space_size (float): size of the (square) space
+        """
+        self.ids = [int(region_id) for region_id in ids]
+        self.index = {region_id: i for i, region_id in enumerate(self.ids)}
+        self.distance = np.asarray(distance, dtype=float)
+        n = len(self.ids)
+
+        if is_bundled_map(self.ids, self.distance):
+            self.names = [BUNDLED_REGIONS[region_id][0] for region_id in self.ids]
+            self.positions = np.array([BUNDLED_REGIONS[region_id][1] for region_id in self.ids]).reshape(n, 2)
+        else:
+            self.names = [f'region {region_id}' for region_id in self.ids]
+            self.positions = embed((self.distance + self.distance.T) / 2, space_size)
+
+        self.heading = self.positions[None, :, :] - self.positions[:, None, :]
+        self.angle = np.arctan2(self.heading[..., 1], self.heading[..., 0])
+        self._position_tuples = [tuple(position) for position in self.positions.tolist()]
+
+    @classmethod
+    def from_lanes(cls, lanes, region_ids=(), space_size=50.):
+        """Builds the region table from the lanes of the `map` of an instance.
+
+        Args:
+            lanes (dict): distance of every lane of the map, {(origin, destination): distance}
+            region_ids (iterable): further region ids, e.g., of truck positions and order origins and destinations
+            space_size (float): size of the (square) space
+
+        Returns:
+            RegionTable: the region table
+        """
+        ids = sorted({region for lane in lanes for region in lane} | set(region_ids))
+        index = {region_id: i for i, region_id in enumerate(ids)}
+
+        distance = np.full((len(ids), len(ids)), np.inf)
+        np.fill_diagonal(distance, 0.)
+        for (origin, destination), lane_distance in lanes.items():
+            distance[index[origin], index[destination]] = lane_distance
+        distance = np.where(np.isinf(distance), distance.T, distance)      # a missing lane is as long as the reverse lane
+        distance = shortest_distances(distance)
+        distance[np.isinf(distance)] = 0.                                   # disconnected regions
+        return cls(ids, distance, space_size)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def position(self, region_id) -> tuple:
+        return self._position_tuples[self.index[region_id]]
+
+    def lane_distance(self, origin, destination) -> float:
+        return self.distance[self.index[origin], self.index[destination]]
+
+    def lane_heading(self, origin, destination) -> np.ndarray:
+        return self.heading[self.index[origin], self.index[destination]]
+
+    def lane_angle(self, origin, destination) -> float:
+        return self.angle[self.index[origin], self.index[destination]]
@@ -0,0 +1,239 @@
+"""Parameter sweep: runs TransportationModel replicas for a grid or a random design of ABC and motion parameters in a process pool,
+and stops configurations that are clearly worse than the best configuration early.
+
+Usage (from the src folder):
+    python -m source.sweep --instance 180 --param order_time_limit=5,10,20 --param w_1=0.5,1,2 --seeds 0-4 --workers 8
+    python -m source.sweep --instance 180 --param w_1=0:2 --param w_2=0:1 --samples 20 --objective load --seeds 0-4
+
+The replicas of all configurations still running are run in rounds, one seed per round. After every round, the configurations
+whose mean objective is worse than the best mean by more than the tolerance are stopped, except for the best configuration.
+With the `steps` objective, the runs of the other configurations in a round are also truncated as soon as they exceed the best
+mean steps by the tolerance, so the slow configurations don't run until completion: the steps of a truncated run count as a
+lower bound of its steps, and the means of a configuration with truncated runs are lower bounds.
+"""
+
+import argparse
+import csv
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from source.batch import parse_seeds, replica_seed
+from source.model import TransportationModel
+
+# parameters of TransportationModel that can be swept, and their type (truck_limit is not swept, no decision reads the truck timer)
+SWEEP_PARAMS = {
+    'order_time_limit': int,
+    'w_1': float,
+    'w_2': float,
+    'w_3': float,
+    'dt': float,
+    'agent_velocity': float,
+}
+
+# objective: (result key, True if larger is better)
+OBJECTIVES = {
+    'steps': ('steps', False),
+    'load': ('average_load_percentage', True),
+}
+
+
+def parse_param(value) -> tuple:
+    """Parses a parameter argument, either a list of values ("order_time_limit=5,10,20") or a range for random designs ("w_1=0:2").
+
+    Args:
+        value (str): parameter argument from the command line
+
+    Returns:
+        tuple: name of the parameter, and a list of values or a (low, high) tuple
+    """
+    name, _, values = value.partition('=')
+    if name not in SWEEP_PARAMS:
+        raise ValueError(f"unknown parameter {name!r}, expected one of {', '.join(SWEEP_PARAMS)}")
+    cast = SWEEP_PARAMS[name]
+    if ':' in values:
+        low, high = values.split(':')
+        return name, (cast(low), cast(high))
+    return name, [cast(v) for v in values.split(',')]
+
+
+def grid_design(params) -> list[dict]:
+    """Returns all combinations of the parameter values.
+
+    Args:
+        params (dict): values of every parameter, {name: list}
+
+    Returns:
+        list[dict]: parameters of every configuration
+    """
+    for name, values in params.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"the range of {name} needs a random design (--samples)")
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*params.values())]
+
+
+def random_design(params, n_samples, seed=0) -> list[dict]:
+    """Returns random configurations: every parameter is drawn from its values, or uniformly from its (low, high) range.
+
+    Args:
+        params (dict): values (list) or range (tuple) of every parameter, {name: list or tuple}
+        n_samples (int): number of configurations
+        seed (int): seed of the design
+
+    Returns:
+        list[dict]: parameters of every configuration
+    """
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_samples):
+        config = {}
+        for name, values in params.items():
+            if isinstance(values, tuple):
+                low, high = values
+                config[name] = int(rng.integers(low, high + 1)) if SWEEP_PARAMS[name] is int else float(rng.uniform(low, high))
+            else:
+                config[name] = values[rng.integers(len(values))]
+        configs.append(config)
+    return configs
+
+
+def run_config(instance_number, config, seed, model_params=None, max_steps=None, entropy=None) -> dict:
+    """Runs a replica of a configuration until all orders are delivered, or until it exceeds `max_steps`.
+
+    Args:
+        instance_number (int): number of the problem instance
+        config (dict): swept parameters of the configuration
+        seed (int): seed of the replica (`batch.replica_seed`)
+        model_params (dict, optional): further keyword arguments passed to `TransportationModel`
+        max_steps (int, optional): steps after which the run is stopped
+        entropy (int, optional): entropy of the seed sequence spawning the replica seeds
+
+    Returns:
+        dict: steps, average load percentage (of the drives so far, if truncated) and whether the run was truncated
+    """
+    model_params = {'trace_level': 'none', **(model_params or {}), **config}
+    model = TransportationModel(instance_number=instance_number, simu_run=seed, plot=False, seed=replica_seed(seed, entropy), **model_params)
+    while model.running and (max_steps is None or model.curr_step <= max_steps):
+        model.step()
+
+    results = model.results or model.recorder.statistics()
+    return {"steps": model.curr_step, "average_load_percentage": results["average_load_percentage"], "truncated": model.running}
+
+
+def run_sweep(instance_number, configs, seeds, objective='steps', tolerance=0.05, model_params=None, max_workers=None, entropy=None) -> list[dict]:
+    """Runs the replicas of all configurations in rounds of one seed, and stops the configurations that are clearly worse
+    than the best one: a configuration is stopped when its mean objective is worse than the mean of the best configuration by
+    more than `tolerance` (relative). The best configuration is never stopped. With the `steps` objective, the runs of a round
+    of all but the best configuration are truncated after the best mean steps plus the tolerance (`run_config`), and their
+    steps count as a lower bound of the steps in the mean objective of their configuration.
+
+    Args:
+        instance_number (int): number of the problem instance
+        configs (list[dict]): swept parameters of every configuration (see `grid_design`, `random_design`)
+        seeds (list[int]): seeds of the replicas of every configuration
+        objective (str): 'steps' (steps until completion, minimized) or 'load' (average load percentage, maximized)
+        tolerance (float): relative margin to the best mean objective before a configuration is stopped
+        model_params (dict, optional): further keyword arguments passed to every `TransportationModel`
+        max_workers (int, optional): number of worker processes, defaults to the number of CPUs
+        entropy (int, optional): entropy of the seed sequence spawning the replica seeds
+
+    Returns:
+        list[dict]: parameters, number of runs and truncated runs, mean steps and average load percentage of all runs (lower
+                    bounds of the steps if runs were truncated, as ranked), and the round in which it was stopped (None if it
+                    ran all seeds) of every configuration, best first
+    """
+    key, maximize = OBJECTIVES[objective]
+    runs = [[] for _ in configs]
+    stopped_at = [None] * len(configs)
+    alive = list(range(len(configs)))
+    best = None
+
+    def mean(i, name):
+        """Mean over all runs of the configuration, with the steps of truncated runs as lower bounds."""
+        return sum(run[name] for run in runs[i]) / len(runs[i])
+
+    def rank(i):
+        return -mean(i, key) if maximize else mean(i, key)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for round_nr, seed in enumerate(seeds):
+            if not alive:
+                break
+            max_steps = None
+            if objective == 'steps' and best is not None:
+                max_steps = math.ceil(mean(best, 'steps') * (1 + tolerance))
+            futures = {i: pool.submit(run_config, instance_number, configs[i], seed, model_params, None if i == best else max_steps, entropy)
+                       for i in alive}
+            for i, future in futures.items():
+                runs[i].append(future.result())
+
+            best = min(alive, key=rank)
+            limit = mean(best, key) * (1 - tolerance) if maximize else mean(best, key) * (1 + tolerance)
+            for i in alive:
+                worse = mean(i, key) < limit if maximize else mean(i, key) > limit
+                if i != best and worse:
+                    stopped_at[i] = round_nr
+            alive = [i for i in alive if stopped_at[i] is None]
+
+    ranked = sorted(range(len(configs)), key=lambda i: (stopped_at[i] is not None, rank(i)))
+    # configurations that ran all seeds first, then by their objective
+    return [{**configs[i], "runs": len(runs[i]), "truncated_runs": sum(run["truncated"] for run in runs[i]),
+             "steps": mean(i, 'steps'), "average_load_percentage": mean(i, 'average_load_percentage'),
+             "stopped_at": stopped_at[i]} for i in ranked]
+
+
+def write_results(results, output_file) -> None:
+    """Writes the results of all configurations to a CSV file, one row per configuration.
+
+    Args:
+        results (list[dict]): results returned by `run_sweep`
+        output_file (str): path to the CSV file
+
+    Returns:
+        None
+    """
+    with open(output_file, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Sweeps ABC and motion parameters of TransportationModel and stops clearly worse configurations early.")
+    parser.add_argument('-i', '--instance', type=int, default=11, help="problem instance number (11, 139, 180)")
+    parser.add_argument('--data-set', default=None, help="path of another problem instance file, e.g. generated by source.generator")
+    parser.add_argument('-p', '--param', action='append', required=True,
+                        help=f"swept parameter, values (name=1,2,3) or range for --samples (name=0:2), one of {', '.join(SWEEP_PARAMS)}")
+    parser.add_argument('-n', '--samples', type=int, default=None, help="number of configurations of a random design, instead of the full grid")
+    parser.add_argument('--design-seed', type=int, default=0, help="seed of the random design")
+    parser.add_argument('-s', '--seeds', nargs='+', default=['0-2'], help="seeds of the replicas of every configuration, e.g. 0 1 2 or 0-9")
+    parser.add_argument('--entropy', type=int, default=None, help="spawn the replica seeds from a seed sequence with this entropy")
+    parser.add_argument('--objective', choices=list(OBJECTIVES), default='steps', help="steps until completion or average load percentage")
+    parser.add_argument('--tolerance', type=float, default=0.05, help="relative margin to the best configuration before stopping one")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('-o', '--output', default='generated_files/sweep_results.csv', help="CSV file with the results of all configurations")
+    parser.add_argument('--event-driven', action='store_true', help="trucks travel the lane distances of the instance map and idle steps are skipped")
+    parser.add_argument('--batch-onlookers', action='store_true', help="OB phase of all orders waiting on a lane at once (batched ABC mode)")
+    args = parser.parse_args(argv)
+
+    params = dict(parse_param(value) for value in args.param)
+    configs = random_design(params, args.samples, args.design_seed) if args.samples else grid_design(params)
+    model_params = {
+        'space_size': 50.,
+        'agent_velocity': 10.,
+        'dt': 6e-2,
+        'event_driven': args.event_driven,
+        'batch_onlookers': args.batch_onlookers,
+        'data_set': args.data_set
+    }
+    results = run_sweep(args.instance, configs, parse_seeds(args.seeds), args.objective, args.tolerance, model_params, args.workers, args.entropy)
+    write_results(results, args.output)
+    stopped = sum(r["stopped_at"] is not None for r in results)
+    print(f"{len(results)} configurations ({stopped} stopped early) written to {args.output}, best: {results[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""Test configuration: the tests import the modules of the src folder and run from it, as the scripts do."""
+
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+
+@pytest.fixture(autouse=True)
+def src_dir(monkeypatch):
+    """Runs every test from the src folder, where the problem instances are found."""
+    monkeypatch.chdir(SRC_DIR)
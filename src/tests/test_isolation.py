@@ -0,0 +1,22 @@
+"""Models sharing one interpreter are isolated: concurrent runs give the results of isolated runs of the same seeds."""
+
+import os
+
+import pytest
+
+from performance_analysis.isolation_check import check_isolation
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+def test_concurrent_models_match_isolated_runs(event_driven):
+    assert check_isolation(139, 4, {'dt': 6e-2, 'agent_velocity': 10., 'event_driven': event_driven}) == []
+
+
+def generated_files():
+    return {entry.name: entry.stat().st_mtime_ns for entry in os.scandir('generated_files')}
+
+
+def test_isolation_check_writes_no_generated_files():
+    before = generated_files()
+    check_isolation(11, 2, {'dt': 6e-2, 'agent_velocity': 10.})
+    assert generated_files() == before